@@ -2,24 +2,36 @@ import fitz
 import logging
 from PIL import Image
 import pytesseract
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from datetime import datetime
+from services.text_extraction import ExtractionResult, take_words
 
 class DocumentProcessor:
     """Handles PDF, image, and text document processing"""
 
+    def _iter_pdf_pages(self, doc) -> Iterator[str]:
+        """Yield page text lazily so callers can stop early"""
+        for page in doc:
+            yield page.get_text()
+
     def extract_text_from_pdf(self, file_path: str) -> str:
         """Extract text from PDF files"""
         try:
-            doc = fitz.open(file_path)
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            return text.strip()
+            with fitz.open(file_path) as doc:
+                return "".join(self._iter_pdf_pages(doc)).strip()
         except Exception as e:
             logging.error(f"PDF extraction error: {e}")
             return ""
 
+    def extract_pdf_excerpt(self, file_path: str, max_words: int = 500) -> ExtractionResult:
+        """Extract PDF text up to max_words, without reading pages past the budget"""
+        try:
+            with fitz.open(file_path) as doc:
+                return take_words(self._iter_pdf_pages(doc), max_words)
+        except Exception as e:
+            logging.error(f"PDF extraction error: {e}")
+            return ExtractionResult("", False)
+
     def extract_text_from_image(self, file_path: str) -> str:
         """Extract text from images using OCR"""
         try:
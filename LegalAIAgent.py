@@ -1,7 +1,12 @@
+import os
 import json
-from collections import deque
+import asyncio
 import logging
-from services.Client import get_client
+from typing import Optional
+from services.Client import get_async_client
+from services.session_manager import ChatSession
+from services.tool_memo import ToolMemoizer, SCOPE_NONE
+from services.semantic_cache import SemanticAnswerCache
 from WebSearchAgent import WebSearchAgent
 from VectorStore import VectorStore
 from system_prompts import LEGAL_AI_SYSTEM_PROMPT
@@ -10,24 +15,42 @@ class LegalAIAgent:
     """🤖 AGENT-BASED TOOL ORCHESTRATION - LLM decides which tools to call"""
 
     def __init__(self, search_api_key: str, mongo_connection_string: str):
-        # Initialize LLM client using centralized client
-        self.aiml_client = get_client()
+        # Initialize async LLM client using centralized client (shared connection pool)
+        self.aiml_client = get_async_client()
 
         # Initialize tools
         self.web_search = WebSearchAgent(search_api_key)
         self.vector_store = VectorStore(mongo_connection_string)
 
-        # Initialize conversation history (keep last 4 exchanges)
-        self.conversation_history = deque(maxlen=8)  # 8 messages = 4 user/assistant pairs
+        # Session used when no per-chat session is supplied (e.g. interactive CLI)
+        self.default_session = ChatSession("default")
 
         # Configuration
         self.MAX_ITERATIONS = 3
         self.MAX_HISTORY_PAIRS = 4
+        self.TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "15"))
+
+        # Memoizes tool results across iterations (request scope) or requests (process scope)
+        self.tool_memo = ToolMemoizer(max_entries=int(os.getenv("TOOL_CACHE_SIZE", "1024")))
+
+        # Optional semantic answer cache in front of the tool loop
+        self.semantic_cache = None
+        if os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true":
+            self.semantic_cache = SemanticAnswerCache(
+                embed=self.vector_store.get_embedding,
+                threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+                ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400")),
+                max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "5000"))
+            )
 
         # Tool registry for the agent
         self.available_tools = {
             "search_recent_laws": {
                 "function": self._search_recent_laws_wrapper,
+                "timeout": float(os.getenv("WEB_SEARCH_TOOL_TIMEOUT_SECONDS", str(self.TOOL_TIMEOUT_SECONDS))),
+                # WebSearchAgent keeps its own TTL cache, so only dedupe within a run by default
+                "cache_scope": os.getenv("WEB_SEARCH_TOOL_CACHE_SCOPE", "request"),
+                "cache_ttl": float(os.getenv("WEB_SEARCH_TOOL_CACHE_TTL_SECONDS", "3600")),
                 "description": "Search for recent legal updates, new laws, and policy changes",
                 "parameters": {
                     "type": "object",
@@ -40,6 +63,9 @@ class LegalAIAgent:
             },
             "search_country_context": {
                 "function": self._search_country_context_wrapper,
+                "timeout": float(os.getenv("VECTOR_SEARCH_TOOL_TIMEOUT_SECONDS", str(self.TOOL_TIMEOUT_SECONDS))),
+                "cache_scope": os.getenv("VECTOR_SEARCH_TOOL_CACHE_SCOPE", "process"),
+                "cache_ttl": float(os.getenv("VECTOR_SEARCH_TOOL_CACHE_TTL_SECONDS", "3600")),
                 "description": "Search country-specific legal context and established laws from knowledge base",
                 "parameters": {
                     "type": "object",
@@ -52,88 +78,213 @@ class LegalAIAgent:
             }
         }
 
-        # Track agent actions
-        self.agent_actions = []
-
-    def _add_agent_action(self, action: str, description: str):
-        """Track agent actions with timestamp"""
-        import datetime
-        timestamp = datetime.datetime.now().isoformat()
-        self.agent_actions.append({
-            "action": action,
-            "description": description,
-            "timestamp": timestamp
-        })
-
-    def _search_recent_laws_wrapper(self, query: str, jurisdiction: str = None) -> str:
+    async def _search_recent_laws_wrapper(self, session: ChatSession, query: str, jurisdiction: str = None) -> str:
         """Wrapper for web search tool"""
-        self._add_agent_action("web_search", f"Searching web for '{query}' in {jurisdiction or 'global'}")
+        session.add_agent_action("web_search", f"Searching web for '{query}' in {jurisdiction or 'global'}")
         print(f"🔍 Agent executing: Web search for '{query}' in {jurisdiction or 'global'}")
-        results = self.web_search.search_recent_laws(query, jurisdiction)
+        results = await self.web_search.search_recent_laws(query, jurisdiction)
         return json.dumps(results, indent=2)
 
-    def _search_country_context_wrapper(self, query: str, country: str) -> str:
+    async def _search_country_context_wrapper(self, session: ChatSession, query: str, country: str) -> str:
         """Wrapper for vector store tool"""
-        self._add_agent_action("vector_search", f"Searching vector store for '{query}' in {country}")
+        session.add_agent_action("vector_search", f"Searching vector store for '{query}' in {country}")
         print(f"🔍 Agent executing: Vector search for '{query}' in {country}")
-        results = self.vector_store.search_similar(query, country)
+        results = await self.vector_store.search_similar(query, country)
         # Convert ObjectId to string for JSON serialization
         for result in results:
             if '_id' in result:
                 result['_id'] = str(result['_id'])
         return json.dumps(results, indent=2)
 
-    def _build_messages_with_history(self, user_query: str) -> list:
+    def _build_messages_with_history(self, user_query: str, session: ChatSession) -> list:
         """Build messages list with conversation history and current query"""
         # Use the system prompt from external file
         messages = [{"role": "system", "content": LEGAL_AI_SYSTEM_PROMPT}]
 
         # Add conversation history
-        messages.extend(list(self.conversation_history))
+        messages.extend(list(session.conversation_history))
 
         # Add current user query
         messages.append({"role": "user", "content": user_query})
 
         return messages
 
-    def _add_to_history(self, user_query: str, assistant_response: str):
+    def _add_to_history(self, session: ChatSession, user_query: str, assistant_response: str):
         """Add user query and assistant response to conversation history"""
-        self.conversation_history.append({"role": "user", "content": user_query})
-        self.conversation_history.append({"role": "assistant", "content": assistant_response})
+        session.add_to_history(user_query, assistant_response)
 
-        print(f"📚 History updated: {len(self.conversation_history)//2} conversation pairs stored")
-
-    def chat_with_agent(self, user_query: str) -> str:
-        """
-        🎯 MAIN AGENT INTEGRATION POINT
-        Agent decides whether and which tools to use with iterative capability
-        """
+        print(f"📚 History updated: {len(session.conversation_history)//2} conversation pairs stored")
 
-        # Tool definitions
-        tools_definition = [
+    def _get_tools_definition(self) -> list:
+        """Tool definitions in OpenAI function-calling format"""
+        return [
             {
                 "type": "function",
                 "function": {
-                    "name": "search_recent_laws",
-                    "description": self.available_tools["search_recent_laws"]["description"],
-                    "parameters": self.available_tools["search_recent_laws"]["parameters"]
+                    "name": name,
+                    "description": tool["description"],
+                    "parameters": tool["parameters"]
                 }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_country_context",
-                    "description": self.available_tools["search_country_context"]["description"],
-                    "parameters": self.available_tools["search_country_context"]["parameters"]
-                }
-            }
+            } for name, tool in self.available_tools.items()
         ]
 
+    async def _invoke_tool(self, session: ChatSession, function_name: str, arguments: dict) -> str:
+        """Execute a tool within its timeout, returning the result text"""
+        tool = self.available_tools[function_name]
+        timeout = tool.get("timeout", self.TOOL_TIMEOUT_SECONDS)
+        try:
+            print(f"   └── Calling {function_name} with args: {arguments}")
+
+            if asyncio.iscoroutinefunction(tool["function"]):
+                call = tool["function"](session, **arguments)
+            else:
+                # Blocking tools run in a worker thread to keep them off the event loop
+                call = asyncio.to_thread(tool["function"], session, **arguments)
+            return await asyncio.wait_for(call, timeout=timeout)
+        except asyncio.TimeoutError:
+            # Async tools are cancelled; a worker thread can't be interrupted, its result is discarded
+            logging.warning(f"Tool {function_name} timed out after {timeout}s")
+            return f"Error: Tool {function_name} timed out after {timeout} seconds"
+        except Exception as e:
+            logging.error(f"Tool {function_name} failed: {e}")
+            return f"Error: Tool {function_name} failed: {str(e)}"
+
+    async def _run_tool(self, session: ChatSession, tool_call: dict, request_memo: Optional[dict] = None) -> str:
+        """Run a single tool call through the memoization layer"""
+        function_name = tool_call["function"]["name"]
+        if function_name not in self.available_tools:
+            return f"Error: Tool {function_name} not found"
+
+        try:
+            arguments = json.loads(tool_call["function"]["arguments"] or "{}")
+        except ValueError as e:
+            return f"Error: Invalid arguments for {function_name}: {str(e)}"
+        if not isinstance(arguments, dict):
+            return f"Error: Invalid arguments for {function_name}: expected an object"
+
+        tool = self.available_tools[function_name]
+        result, reused = await self.tool_memo.run(
+            function_name,
+            arguments,
+            lambda: self._invoke_tool(session, function_name, arguments),
+            scope=tool.get("cache_scope", SCOPE_NONE),
+            ttl_seconds=tool.get("cache_ttl"),
+            request_memo=request_memo
+        )
+        if reused:
+            session.add_agent_action("tool_cache_hit", f"Reused earlier {function_name} result for {arguments}")
+            print(f"   └── Reused memoized {function_name} result for args: {arguments}")
+        return result
+
+    async def _prefetch_context_embeddings(self, tool_calls: list):
+        """Embed all knowledge-base queries of one iteration with a single batched request"""
+        queries = []
+        for tool_call in tool_calls:
+            if tool_call["function"]["name"] != "search_country_context":
+                continue
+            try:
+                query = json.loads(tool_call["function"]["arguments"] or "{}").get("query")
+            except (ValueError, AttributeError):
+                continue
+            if isinstance(query, str) and query.strip():
+                queries.append(query)
+
+        if len(queries) > 1:
+            try:
+                # Warms the embedding cache so the individual searches skip the embeddings call
+                await asyncio.to_thread(self.vector_store.get_embeddings, queries)
+            except Exception as e:
+                logging.warning(f"Batched embedding prefetch failed: {e}")
+
+    async def _execute_tool_calls(self, session: ChatSession, messages: list, tool_calls: list, request_memo: dict):
+        """
+        Execute the tool calls of one iteration concurrently and append their
+        results to messages in the original tool_call order
+        """
+        await self._prefetch_context_embeddings(tool_calls)
+        tool_results = await asyncio.gather(*(self._run_tool(session, tool_call, request_memo) for tool_call in tool_calls))
+
+        for tool_call, tool_result in zip(tool_calls, tool_results):
+            # Add tool result to conversation
+            messages.append({
+                "tool_call_id": tool_call["id"],
+                "role": "tool",
+                "name": tool_call["function"]["name"],
+                "content": tool_result
+            })
+
+    def _final_answer_instruction(self) -> dict:
+        """Instruction appended when the iteration budget is exhausted"""
+        return {
+            "role": "system",
+            "content": "Please provide your final response based on all the information gathered so far. Do not call any more tools."
+        }
+
+    async def _lookup_cached_answer(self, user_query: str, session: ChatSession, cacheable: bool, context: Optional[str]):
+        """
+        Check the semantic answer cache
+
+        Returns:
+            (signature, answer): signature is None when caching doesn't apply,
+            answer is None on a miss
+        """
+        if self.semantic_cache is None or not cacheable:
+            return None, None
+        signature = self.semantic_cache.signature(user_query, context, session.conversation_history)
+        if signature is None:
+            return None, None
+        try:
+            answer = await self.semantic_cache.lookup(user_query, signature)
+        except Exception as e:
+            logging.warning(f"Semantic cache lookup failed: {e}")
+            return None, None
+        if answer is not None:
+            session.add_agent_action("semantic_cache_hit", "Answered from a previous near-identical question")
+            print("⚡ Semantic cache hit - skipping tool loop")
+            self._add_to_history(session, user_query, answer)
+        return signature, answer
+
+    async def _store_cached_answer(self, user_query: str, signature: Optional[str], answer: Optional[str]):
+        """Remember a final answer in the semantic answer cache"""
+        if signature is None or not answer:
+            return
+        try:
+            await self.semantic_cache.store(user_query, signature, answer)
+        except Exception as e:
+            logging.warning(f"Semantic cache store failed: {e}")
+
+    async def chat_with_agent(
+        self,
+        user_query: str,
+        session: Optional[ChatSession] = None,
+        cacheable: bool = True,
+        context: Optional[str] = None
+    ) -> str:
+        """
+        🎯 MAIN AGENT INTEGRATION POINT
+        Agent decides whether and which tools to use with iterative capability
+
+        Args:
+            user_query: Prompt for this turn
+            session: Per-chat session holding history and agent actions
+                     (falls back to the agent's default session)
+            cacheable: Whether the semantic answer cache may be used (False when
+                       a document or image is attached)
+            context: User-supplied context, part of the answer cache signature
+        """
+        session = session or self.default_session
+        tools_definition = self._get_tools_definition()
+        request_memo = self.tool_memo.new_request_memo()
+
+        cache_signature, cached_answer = await self._lookup_cached_answer(user_query, session, cacheable, context)
+        if cached_answer is not None:
+            return cached_answer
+
         try:
             # Build initial messages with history
-            messages = self._build_messages_with_history(user_query)
+            messages = self._build_messages_with_history(user_query, session)
 
-            print(f"🤖 Agent analyzing query: '{user_query}' (with {len(self.conversation_history)//2} previous conversations)")
+            print(f"🤖 Agent analyzing query: '{user_query}' (with {len(session.conversation_history)//2} previous conversations)")
 
             # Iterative tool calling loop
             iteration = 0
@@ -144,7 +295,7 @@ class LegalAIAgent:
                 print(f"🔄 Iteration {iteration}/{self.MAX_ITERATIONS}")
 
                 # Agent makes decision
-                response = self.aiml_client.chat.completions.create(
+                response = await self.aiml_client.chat.completions.create(
                     model="gpt-4o-mini",
                     messages=messages,
                     tools=tools_definition,
@@ -160,7 +311,8 @@ class LegalAIAgent:
                     final_response = response_message.content
 
                     # Add to conversation history
-                    self._add_to_history(user_query, final_response)
+                    self._add_to_history(session, user_query, final_response)
+                    await self._store_cached_answer(user_query, cache_signature, final_response)
 
                     return final_response
 
@@ -191,25 +343,7 @@ class LegalAIAgent:
                 messages.append(assistant_message)
 
                 # Execute each tool
-                for tool_call in response_message.tool_calls:
-                    function_name = tool_call.function.name
-                    arguments = json.loads(tool_call.function.arguments)
-
-                    print(f"   └── Calling {function_name} with args: {arguments}")
-
-                    # Execute the tool
-                    if function_name in self.available_tools:
-                        tool_result = self.available_tools[function_name]["function"](**arguments)
-                    else:
-                        tool_result = f"Error: Tool {function_name} not found"
-
-                    # Add tool result to conversation
-                    messages.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": function_name,
-                        "content": tool_result
-                    })
+                await self._execute_tool_calls(session, messages, assistant_message["tool_calls"], request_memo)
 
                 # Continue to next iteration to let agent decide if it needs more tools
                 print(f"🔄 Completed iteration {iteration}, continuing to see if agent needs more information...")
@@ -218,12 +352,9 @@ class LegalAIAgent:
             print(f"⚠️ Reached maximum iterations ({self.MAX_ITERATIONS}), generating final response...")
 
             # Add instruction to provide final answer
-            messages.append({
-                "role": "system",
-                "content": "Please provide your final response based on all the information gathered so far. Do not call any more tools."
-            })
+            messages.append(self._final_answer_instruction())
 
-            final_response_obj = self.aiml_client.chat.completions.create(
+            final_response_obj = await self.aiml_client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=messages,
                 temperature=0.3
@@ -232,7 +363,8 @@ class LegalAIAgent:
             final_response = final_response_obj.choices[0].message.content
 
             # Add to conversation history
-            self._add_to_history(user_query, final_response)
+            self._add_to_history(session, user_query, final_response)
+            await self._store_cached_answer(user_query, cache_signature, final_response)
 
             return final_response
 
@@ -241,33 +373,164 @@ class LegalAIAgent:
             error_response = f"I encountered an error while processing your request: {str(e)}"
 
             # Still add to history even if there was an error
-            self._add_to_history(user_query, error_response)
+            self._add_to_history(session, user_query, error_response)
 
             return error_response
 
-    def clear_history(self):
+    async def _stream_completion(self, messages: list, tools_definition: Optional[list] = None):
+        """
+        Stream one completion, yielding ("token", text) as content arrives and
+        finally ("message", assistant_message) with any assembled tool calls
+        """
+        request = {"model": "gpt-4o-mini", "messages": messages, "temperature": 0.3, "stream": True}
+        if tools_definition:
+            request.update(tools=tools_definition, tool_choice="auto")
+
+        content_parts = []
+        tool_calls = {}  # index -> partially assembled tool call
+
+        stream = await self.aiml_client.chat.completions.create(**request)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+
+            if delta.content:
+                content_parts.append(delta.content)
+                yield "token", delta.content
+
+            for tool_call_delta in delta.tool_calls or []:
+                tool_call = tool_calls.setdefault(tool_call_delta.index, {
+                    "id": None,
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""}
+                })
+                if tool_call_delta.id:
+                    tool_call["id"] = tool_call_delta.id
+                if tool_call_delta.function:
+                    if tool_call_delta.function.name:
+                        tool_call["function"]["name"] += tool_call_delta.function.name
+                    if tool_call_delta.function.arguments:
+                        tool_call["function"]["arguments"] += tool_call_delta.function.arguments
+
+        assistant_message = {"role": "assistant"}
+        if tool_calls:
+            assistant_message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+        if content_parts:
+            assistant_message["content"] = "".join(content_parts)
+        yield "message", assistant_message
+
+    async def stream_chat_with_agent(
+        self,
+        user_query: str,
+        session: Optional[ChatSession] = None,
+        cacheable: bool = True,
+        context: Optional[str] = None
+    ):
+        """
+        Streaming variant of chat_with_agent
+
+        Yields event dicts:
+            {"type": "tool_call", "name": ..., "arguments": ...}  before a tool runs
+            {"type": "tool_result", "name": ...}                  after a tool finished
+            {"type": "token", "content": ..., "iteration": n}     completion text as it arrives
+            {"type": "reset", "iteration": n}                     discard the tokens of iteration n: it
+                                                                  ended in tool calls, so it isn't the answer
+            {"type": "error", "message": ...}                     agent failure
+            {"type": "done", "response": ...}                     full final response (always last)
+
+        The tokens streamed after the last reset add up to `done.response`.
+        """
+        session = session or self.default_session
+        tools_definition = self._get_tools_definition()
+        request_memo = self.tool_memo.new_request_memo()
+
+        cache_signature, cached_answer = await self._lookup_cached_answer(user_query, session, cacheable, context)
+        if cached_answer is not None:
+            yield {"type": "token", "content": cached_answer, "iteration": 1}
+            yield {"type": "done", "response": cached_answer}
+            return
+
+        try:
+            messages = self._build_messages_with_history(user_query, session)
+
+            print(f"🤖 Agent streaming query: '{user_query}' (with {len(session.conversation_history)//2} previous conversations)")
+
+            assistant_message = {}
+            for iteration in range(1, self.MAX_ITERATIONS + 2):
+                final_pass = iteration > self.MAX_ITERATIONS
+                if final_pass:
+                    # If we've reached max iterations, force final response
+                    print(f"⚠️ Reached maximum iterations ({self.MAX_ITERATIONS}), generating final response...")
+                    messages.append(self._final_answer_instruction())
+                else:
+                    print(f"🔄 Iteration {iteration}/{self.MAX_ITERATIONS}")
+
+                streamed_text = False
+                async for kind, payload in self._stream_completion(messages, None if final_pass else tools_definition):
+                    if kind == "token":
+                        streamed_text = True
+                        yield {"type": "token", "content": payload, "iteration": iteration}
+                    else:
+                        assistant_message = payload
+
+                if not assistant_message.get("tool_calls"):
+                    break
+                if streamed_text:
+                    # Text before tool calls (e.g. "Let me look that up") isn't part of the answer
+                    yield {"type": "reset", "iteration": iteration}
+
+                messages.append(assistant_message)
+                tool_calls = assistant_message["tool_calls"]
+                for tool_call in tool_calls:
+                    yield {
+                        "type": "tool_call",
+                        "name": tool_call["function"]["name"],
+                        "arguments": tool_call["function"]["arguments"]
+                    }
+                await self._execute_tool_calls(session, messages, tool_calls, request_memo)
+                for tool_call in tool_calls:
+                    yield {"type": "tool_result", "name": tool_call["function"]["name"]}
+
+            final_response = assistant_message.get("content") or ""
+            self._add_to_history(session, user_query, final_response)
+            await self._store_cached_answer(user_query, cache_signature, final_response)
+            yield {"type": "done", "response": final_response}
+
+        except Exception as e:
+            logging.error(f"Agent error: {e}")
+            error_response = f"I encountered an error while processing your request: {str(e)}"
+
+            # Still add to history even if there was an error
+            self._add_to_history(session, user_query, error_response)
+
+            yield {"type": "error", "message": error_response}
+            yield {"type": "done", "response": error_response}
+
+    def clear_history(self, session: Optional[ChatSession] = None):
         """Clear conversation history"""
-        self.conversation_history.clear()
+        (session or self.default_session).clear_history()
         print("🗑️ Conversation history cleared")
 
-    def get_agent_actions(self):
+    def get_agent_actions(self, session: Optional[ChatSession] = None):
         """Get current agent actions"""
-        return self.agent_actions.copy()
+        return (session or self.default_session).get_agent_actions()
 
-    def clear_agent_actions(self):
+    def clear_agent_actions(self, session: Optional[ChatSession] = None):
         """Clear agent actions"""
-        self.agent_actions.clear()
+        (session or self.default_session).clear_agent_actions()
 
     def show_history(self):
         """Display current conversation history"""
-        if not self.conversation_history:
+        history = self.default_session.conversation_history
+        if not history:
             print("📚 No conversation history")
             return
 
-        print(f"📚 Conversation History ({len(self.conversation_history)//2} exchanges):")
+        print(f"📚 Conversation History ({len(history)//2} exchanges):")
         print("-" * 60)
 
-        for i, msg in enumerate(self.conversation_history):
+        for i, msg in enumerate(history):
             role_emoji = "👤" if msg["role"] == "user" else "🤖"
             content = msg["content"][:100] + "..." if len(msg["content"]) > 100 else msg["content"]
             print(f"{role_emoji} {msg['role'].title()}: {content}")
@@ -275,6 +538,10 @@ class LegalAIAgent:
 
     def interactive_chat(self):
         """Interactive chat interface with agent-based tool selection and history management"""
+        asyncio.run(self._interactive_chat_loop())
+
+    async def _interactive_chat_loop(self):
+        """Run the interactive chat on a single event loop so the pooled client is reused"""
         print("🤖 Legal AI Agent initialized!")
         print("Features:")
         print("  • Conversation history: Remembers last 4 exchanges")
@@ -299,5 +566,5 @@ class LegalAIAgent:
             if not user_input:
                 continue
 
-            print(f"\n🤖 Agent: {self.chat_with_agent(user_input)}")
+            print(f"\n🤖 Agent: {await self.chat_with_agent(user_input)}")
             print("-" * 50)
\ No newline at end of file
@@ -1,32 +1,30 @@
-from pymongo import MongoClient
-from typing import List, Dict
+import os
+import asyncio
+from typing import List, Dict, Optional
 from services.Client import get_client
+from services.database import get_async_mongo_client
+from services.embedding_cache import EmbeddingCache, normalize_text
+from services.vector_index import LocalVectorIndex
 
-class VectorStore:
-    """MongoDB vector store for country documents"""
-
-    def __init__(self, connection_string: str, db_name: str = "country_db", collection_name: str = "country_embeddings"):
-        self.client = MongoClient(connection_string)
-        self.db = self.client[db_name]
-        self.collection = self.db[collection_name]
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_BATCH_SIZE = 256  # inputs per embeddings request
 
-    def get_embedding(self, text: str):
-        """Generate embedding for query"""
-        client = get_client()
-        return client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        ).data[0].embedding
+class AtlasVectorBackend:
+    """MongoDB Atlas $vectorSearch backend (async collection)"""
 
-    def search_similar(self, query: str, country: str, limit: int = 2) -> List[Dict]:
-        """Search for similar text in a given country"""
-        query_embedding = self.get_embedding(query)
+    def __init__(self, collection, index_name: str = "vector_index"):
+        self.collection = collection
+        self.index_name = index_name
+        # Caps the $vectorSearch aggregations of multi-query searches in flight at once
+        self._search_slots = asyncio.Semaphore(int(os.getenv("VECTOR_SEARCH_CONCURRENCY", "8")))
 
+    def _build_search_pipeline(self, query_embedding: List[float], country: str, limit: int) -> List[Dict]:
+        """Build the $vectorSearch pipeline for one query"""
         # Build pipeline with filter inside vectorSearch
-        pipeline = [
+        return [
             {
                 "$vectorSearch": {
-                    "index": "vector_index",       # must match your Atlas index name
+                    "index": self.index_name,       # must match your Atlas index name
                     "path": "embedding",
                     "queryVector": query_embedding,
                     "filter": {"country": country},  # ✅ filter by country here
@@ -43,6 +41,123 @@ class VectorStore:
             }
         ]
 
-        results = list(self.collection.aggregate(pipeline))
+    async def search(self, query_embedding: List[float], country: str, limit: int = 2) -> List[Dict]:
+        """Top-k search for one query in a given country"""
+        async with self._search_slots:
+            cursor = await self.collection.aggregate(self._build_search_pipeline(query_embedding, country, limit))
+            return await cursor.to_list()
+
+    async def search_many(self, query_embeddings: List[List[float]], country: str, limit: int = 2) -> List[List[Dict]]:
+        """Top-k search for several queries, running the aggregations concurrently"""
+        return list(await asyncio.gather(*(
+            self.search(embedding, country, limit) for embedding in query_embeddings
+        )))
+
+class VectorStore:
+    """
+    Vector store for country documents
+
+    The search backend is chosen with VECTOR_BACKEND: "atlas" (default) queries
+    the Atlas `vector_index`, "local" answers from an in-process NumPy index
+    loaded from the snapshot at VECTOR_SNAPSHOT_PATH (exported beforehand
+    with `python -m services.vector_index`).
+    """
+
+    def __init__(
+        self,
+        connection_string: Optional[str],
+        db_name: str = "country_db",
+        collection_name: str = "country_embeddings",
+        embedding_cache: Optional[EmbeddingCache] = None,
+        backend: Optional[str] = None,
+        snapshot_path: Optional[str] = None
+    ):
+        # Shared pooled client; searches run on the event loop like the API's own queries
+        self.client = get_async_mongo_client(connection_string) if connection_string else None
+        self.db = self.client[db_name] if self.client is not None else None
+        self.collection = self.db[collection_name] if self.db is not None else None
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+
+        backend = (backend or os.getenv("VECTOR_BACKEND", "atlas")).lower()
+        snapshot_path = snapshot_path or os.getenv("VECTOR_SNAPSHOT_PATH", ".cache/vector_snapshot")
+        if backend == "local":
+            if not LocalVectorIndex.snapshot_exists(snapshot_path):
+                # Exporting the whole collection would block startup; it's a separate step
+                raise ValueError(
+                    f"No vector snapshot at {snapshot_path}; export one with "
+                    f"`python -m services.vector_index {snapshot_path}`"
+                )
+            self.backend = LocalVectorIndex(snapshot_path)
+        elif backend == "atlas":
+            if self.collection is None:
+                raise ValueError("The atlas vector backend requires a MongoDB connection string")
+            self.backend = AtlasVectorBackend(self.collection)
+        else:
+            raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+
+    def get_embedding(self, text: str):
+        """Generate embedding for query (served from the embedding cache when possible)"""
+        cached = self.embedding_cache.get(EMBEDDING_MODEL, text)
+        if cached is not None:
+            return cached
+
+        client = get_client()
+        embedding = client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=normalize_text(text)
+        ).data[0].embedding
+        self.embedding_cache.put(EMBEDDING_MODEL, text, embedding)
+        return embedding
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts, batching every cache miss into one request"""
+        embeddings = self.embedding_cache.get_many(EMBEDDING_MODEL, texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in embeddings))
+
+        if missing:
+            client = get_client()
+            for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+                batch = missing[start:start + EMBEDDING_BATCH_SIZE]
+                response = client.embeddings.create(
+                    model=EMBEDDING_MODEL,
+                    input=[normalize_text(text) for text in batch]
+                )
+                fresh = {
+                    text: item.embedding
+                    for text, item in zip(batch, sorted(response.data, key=lambda item: item.index))
+                }
+                self.embedding_cache.put_many(EMBEDDING_MODEL, fresh)
+                embeddings.update(fresh)
+
+        return [embeddings[text] for text in texts]
+
+    async def _search_backend(self, query_embeddings: List[List[float]], country: str, limit: int) -> List[List[Dict]]:
+        if isinstance(self.backend, AtlasVectorBackend):
+            return await self.backend.search_many(query_embeddings, country, limit)
+        # The local index is a NumPy matrix product; keep it off the event loop
+        return await asyncio.to_thread(self.backend.search_many, query_embeddings, country, limit)
+
+    async def search_similar(self, query: str, country: str, limit: int = 2) -> List[Dict]:
+        """Search for similar text in a given country"""
+        query_embedding = await asyncio.to_thread(self.get_embedding, query)
+
+        results = (await self._search_backend([query_embedding], country, limit))[0]
         print(results)
-        return results
\ No newline at end of file
+        return results
+
+    async def search_similar_many(self, queries: List[str], country: str, limit: int = 2) -> List[List[Dict]]:
+        """
+        Search several queries in a given country
+
+        All queries are embedded with a single batched request; the Atlas
+        backend runs the $vectorSearch aggregations concurrently and the
+        local backend scores them with one matrix product.
+
+        Returns:
+            One result list per query, in the order of `queries`
+        """
+        if not queries:
+            return []
+
+        query_embeddings = await asyncio.to_thread(self.get_embeddings, queries)
+        return await self._search_backend(query_embeddings, country, limit)
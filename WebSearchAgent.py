@@ -1,15 +1,111 @@
-import requests
+import os
+import json
+import time
+import asyncio
 import logging
-from typing import List, Dict
+from collections import deque
+from typing import List, Dict, Optional
+from services.Client import get_http_client
+from services.ttl_cache import TTLCache
+
+SERPER_SEARCH_URL = "https://google.serper.dev/search"
 
 class WebSearchAgent:
-    """Handles real-time legal information searches"""
+    """
+    Handles real-time legal information searches
+
+    Requests go through the shared async HTTP client. If a search hasn't
+    answered within the observed p95 latency, a second identical request is
+    sent and whichever returns first wins (the other is cancelled). Every
+    search is bounded by a strict total deadline.
+    """
 
-    def __init__(self, search_api_key: str):
+    def __init__(self, search_api_key: str, cache: Optional[TTLCache] = None):
         self.api_key = search_api_key
+        self.attempt_timeout = float(os.getenv("WEB_SEARCH_TIMEOUT_SECONDS", "8"))
+        self.deadline = float(os.getenv("WEB_SEARCH_DEADLINE_SECONDS", "10"))
+
+        # Hedging configuration
+        self.hedging_enabled = os.getenv("WEB_SEARCH_HEDGING", "true").lower() == "true"
+        self.default_hedge_delay = float(os.getenv("WEB_SEARCH_HEDGE_DELAY_SECONDS", "1.5"))
+        self.min_hedge_delay = float(os.getenv("WEB_SEARCH_MIN_HEDGE_DELAY_SECONDS", "0.3"))
+        self._latencies = deque(maxlen=200)  # recent successful request latencies (seconds)
+
+        # Legal updates don't change minute to minute, so identical searches are served from cache
+        self.cache = cache or TTLCache(
+            max_entries=int(os.getenv("WEB_SEARCH_CACHE_SIZE", "512")),
+            ttl_seconds=float(os.getenv("WEB_SEARCH_CACHE_TTL_SECONDS", "21600")),
+            persist_path=os.getenv("WEB_SEARCH_CACHE_PATH") or None
+        )
+
+        self.requests_sent = 0
+        self.hedged_searches = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+
+    @staticmethod
+    def _cache_key(query: str, jurisdiction: Optional[str]) -> str:
+        """Cache key from the normalized (query, jurisdiction) pair"""
+        return json.dumps([" ".join((value or "").lower().split()) for value in (query, jurisdiction)])
+
+    def _hedge_delay(self) -> float:
+        """Delay before sending the hedge: p95 of recent latencies once enough samples exist"""
+        if len(self._latencies) < 20:
+            return self.default_hedge_delay
+        ordered = sorted(self._latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(self.min_hedge_delay, p95)
+
+    async def _fetch(self, params: Dict) -> Dict:
+        """Send one search request"""
+        self.requests_sent += 1
+        started = time.perf_counter()
+        response = await get_http_client().get(
+            SERPER_SEARCH_URL,
+            params=params,
+            headers={"X-API-KEY": self.api_key},
+            timeout=self.attempt_timeout
+        )
+        response.raise_for_status()
+        self._latencies.append(time.perf_counter() - started)
+        return response.json()
 
-    def search_recent_laws(self, query: str, jurisdiction: str = None) -> List[Dict]:
+    async def _hedged_fetch(self, params: Dict) -> Dict:
+        """Send the request, hedging with a second one if the first is slower than p95"""
+        primary = asyncio.create_task(self._fetch(params))
+        pending = {primary}
+        hedged = not self.hedging_enabled
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                timeout = None if hedged else self._hedge_delay()
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+
+                # Slow (timed out) or failed fast: send the hedge once
+                if not hedged:
+                    hedged = True
+                    self.hedged_searches += 1
+                    pending.add(asyncio.create_task(self._fetch(params)))
+
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def search_recent_laws(self, query: str, jurisdiction: str = None) -> List[Dict]:
         """Search for recent legal updates and changes"""
+        cache_key = self._cache_key(query, jurisdiction)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return [dict(source) for source in cached]
+
         # Enhanced query with legal terms
         legal_query = f"{query} law statute regulation 2024 2025"
         if jurisdiction:
@@ -17,12 +113,10 @@ class WebSearchAgent:
 
         # Use your preferred search API (Serper, Brave, etc.)
         try:
-            response = requests.get(
-                "https://google.serper.dev/search?q=apple+inc&apiKey=",
-                headers={"X-API-KEY": self.api_key},
-                params={"q": legal_query, "num": 5}
+            results = await asyncio.wait_for(
+                self._hedged_fetch({"q": legal_query, "num": 5}),
+                timeout=self.deadline
             )
-            results = response.json()
 
             # Filter and structure legal sources
             legal_sources = []
@@ -36,7 +130,24 @@ class WebSearchAgent:
                         'source_type': 'official' if '.gov' in result.get('link', '') else 'legal'
                     })
 
-            return legal_sources
+            # Only successful searches are cached
+            self.cache.set(cache_key, legal_sources)
+            return [dict(source) for source in legal_sources]
+        except asyncio.TimeoutError:
+            self.deadline_exceeded += 1
+            logging.error(f"Web search exceeded its {self.deadline}s deadline")
+            return []
         except Exception as e:
             logging.error(f"Web search error: {e}")
             return []
+
+    def stats(self) -> Dict:
+        """Request and hedging counters"""
+        return {
+            "requests_sent": self.requests_sent,
+            "hedged_searches": self.hedged_searches,
+            "hedge_wins": self.hedge_wins,
+            "deadline_exceeded": self.deadline_exceeded,
+            "hedge_delay_seconds": round(self._hedge_delay(), 3),
+            "cache": self.cache.stats(),
+        }
@@ -0,0 +1,131 @@
+"""
+MongoDB benchmark: request throughput and event-loop stalls for the same
+query issued from async handlers three ways.
+
+- blocking:  pymongo MongoClient called directly on the event loop
+- to_thread: pymongo MongoClient via asyncio.to_thread (default executor)
+- async:     pymongo AsyncMongoClient with the settings of services/database.py
+
+Usage:
+    python -m benchmarks.mongo_async                         # uses MONGODB_URI
+    python -m benchmarks.mongo_async --requests 2000 --concurrency 200
+
+Seeds a scratch collection (dropped afterwards) with one chat's messages and
+runs the /chat history query against it. "max loop lag" is the longest a
+1ms ticker task waited to be scheduled, i.e. how long other requests would
+have been stalled.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from typing import Awaitable, Callable, Dict, List
+
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.database import client_options, get_async_mongo_client, close_mongo_clients
+
+COLLECTION = "benchmark_messages"
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def measure(query: Callable[[], Awaitable[None]], requests: int, concurrency: int) -> Dict[str, float]:
+    """Run `requests` queries with at most `concurrency` in flight"""
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal max_lag
+        while not done.is_set():
+            expected = time.perf_counter() + 0.001
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - expected)
+
+    async def one():
+        async with slots:
+            started = time.perf_counter()
+            await query()
+            latencies.append(time.perf_counter() - started)
+
+    ticker_task = asyncio.ensure_future(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticker_task
+
+    return {
+        "req/s": requests / elapsed,
+        "p50 ms": percentile(latencies, 0.5) * 1000,
+        "p95 ms": percentile(latencies, 0.95) * 1000,
+        "max loop lag ms": max_lag * 1000,
+    }
+
+
+async def run(uri: str, requests: int, concurrency: int, messages: int):
+    sync_client = MongoClient(uri, **client_options())
+    async_client = get_async_mongo_client(uri)
+    sync_collection = sync_client.get_database()[COLLECTION]
+    async_collection = async_client.get_database()[COLLECTION]
+
+    chat_id = ObjectId()
+    sync_collection.drop()
+    sync_collection.insert_many([
+        {"chat_id": chat_id, "role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " * 20, "timestamp": i}
+        for i in range(messages)
+    ])
+    sync_collection.create_index([("chat_id", 1), ("timestamp", 1)])
+
+    query_filter = {"chat_id": chat_id, "role": {"$in": ["user", "assistant"]}}
+    projection = {"role": 1, "content": 1}
+
+    def fetch_sync():
+        return list(sync_collection.find(query_filter, projection).sort("timestamp", -1).limit(20))
+
+    async def blocking():
+        fetch_sync()
+
+    async def to_thread():
+        await asyncio.to_thread(fetch_sync)
+
+    async def native():
+        await async_collection.find(query_filter, projection).sort("timestamp", -1).limit(20).to_list()
+
+    try:
+        print(f"{requests} requests, concurrency {concurrency}, {messages} messages in the chat")
+        for name, query in (("blocking", blocking), ("to_thread", to_thread), ("async", native)):
+            await query()  # open connections before timing
+            result = await measure(query, requests, concurrency)
+            print(f"  {name:<10}" + "  ".join(f"{key} {value:8.1f}" for key, value in result.items()))
+    finally:
+        sync_collection.drop()
+        sync_client.close()
+        await close_mongo_clients()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Benchmark blocking vs async MongoDB access from async handlers")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI"), help="connection string (default: MONGODB_URI)")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=200, help="messages seeded into the benchmark chat")
+    args = parser.parse_args()
+    if not args.uri:
+        parser.error("MONGODB_URI is not set; pass --uri")
+    asyncio.run(run(args.uri, args.requests, args.concurrency, args.messages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+OCR benchmark: Tesseract time and character accuracy with and without the
+preprocessing pipeline in services/ocr_preprocessing.py.
+
+Usage:
+    python -m benchmarks.ocr_preprocessing                      # synthetic phone-photo pages
+    python -m benchmarks.ocr_preprocessing scan1.jpg scan2.png  # real images; ground truth in scan1.txt, ...
+    python -m benchmarks.ocr_preprocessing --psm 4 --repeat 3
+
+Accuracy is 1 - (character edit distance / ground-truth length) after
+collapsing whitespace.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+import pytesseract
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ocr_preprocessing import preprocess_for_ocr, tesseract_config
+
+SAMPLE_TEXT = (
+    "This Lease Agreement is entered into by and between the Landlord and the Tenant. "
+    "The Tenant agrees to pay rent on the first day of each month. A late fee of five "
+    "percent applies to any payment received after the fifth day of the month. Either "
+    "party may terminate this agreement with sixty days written notice. The security "
+    "deposit shall be returned within thirty days of the end of the tenancy, less any "
+    "deductions for damage beyond normal wear and tear. This agreement is governed by "
+    "the laws of the State of California."
+)
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance"""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def char_accuracy(expected: str, actual: str) -> float:
+    expected = " ".join(expected.split())
+    actual = " ".join(actual.split())
+    if not expected:
+        return 0.0
+    return max(0.0, 1 - edit_distance(expected, actual) / len(expected))
+
+
+def synthetic_page(text: str, seed: int) -> Image.Image:
+    """Render text as a ~12MP tilted, noisy, unevenly lit photo of a page"""
+    rng = random.Random(seed)
+    width, height = 3000, 4000
+    page = Image.new("RGB", (width, height), (236, 232, 220))
+    draw = ImageDraw.Draw(page)
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", 64)
+    except OSError:
+        font = ImageFont.load_default()
+
+    words, line, y = text.split(), "", 200
+    for word in words:
+        candidate = f"{line} {word}".strip()
+        if draw.textlength(candidate, font=font) > width - 400:
+            draw.text((200, y), line, fill=(40, 40, 48), font=font)
+            line, y = word, y + 110
+        else:
+            line = candidate
+    draw.text((200, y), line, fill=(40, 40, 48), font=font)
+
+    # Lighting gradient, sensor noise and a slight tilt
+    gradient = Image.linear_gradient("L").resize((width, height)).point(lambda v: 255 - v // 4)
+    page = Image.composite(page, Image.new("RGB", page.size, (150, 150, 140)), gradient)
+    noise = Image.effect_noise((width, height), 18).convert("RGB")
+    page = Image.blend(page, noise, 0.08).filter(ImageFilter.GaussianBlur(1.2))
+    return page.rotate(rng.uniform(-3, 3), resample=Image.BICUBIC, expand=True, fillcolor=(150, 150, 140))
+
+
+def load_samples(paths: List[str]) -> List[Tuple[str, Image.Image, str]]:
+    if not paths:
+        return [(f"synthetic-{seed}", synthetic_page(SAMPLE_TEXT, seed), SAMPLE_TEXT) for seed in range(3)]
+
+    samples = []
+    for path in paths:
+        truth_path = os.path.splitext(path)[0] + ".txt"
+        if not os.path.exists(truth_path):
+            print(f"skipping {path}: no ground truth at {truth_path}")
+            continue
+        with open(truth_path, encoding="utf-8") as handle:
+            samples.append((os.path.basename(path), Image.open(path), handle.read()))
+    return samples
+
+
+def run(image: Image.Image, preprocess: bool, psm: Optional[int], repeat: int) -> Tuple[float, str]:
+    """Best-of-`repeat` seconds (preprocessing included) and the OCR output"""
+    best, text = float("inf"), ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        prepared = preprocess_for_ocr(image) if preprocess else image.convert("RGB")
+        text = pytesseract.image_to_string(prepared, config=tesseract_config(psm))
+        best = min(best, time.perf_counter() - started)
+    return best, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR with and without preprocessing")
+    parser.add_argument("images", nargs="*", help="image files with a sibling .txt ground truth")
+    parser.add_argument("--psm", type=int, default=None, help="Tesseract page segmentation mode (default: OCR_PSM)")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    samples = load_samples(args.images)
+    print(f"{'sample':<24}{'size':>12}{'raw s':>9}{'raw acc':>9}{'prep s':>9}{'prep acc':>10}")
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for name, image, truth in samples:
+        raw_seconds, raw_text = run(image, False, args.psm, args.repeat)
+        prep_seconds, prep_text = run(image, True, args.psm, args.repeat)
+        raw_acc, prep_acc = char_accuracy(truth, raw_text), char_accuracy(truth, prep_text)
+        for index, value in enumerate((raw_seconds, raw_acc, prep_seconds, prep_acc)):
+            totals[index] += value
+        size = f"{image.width}x{image.height}"
+        print(f"{name:<24}{size:>12}{raw_seconds:>9.2f}{raw_acc:>9.1%}{prep_seconds:>9.2f}{prep_acc:>10.1%}")
+
+    if samples:
+        count = len(samples)
+        print(f"{'mean':<24}{'':>12}{totals[0] / count:>9.2f}{totals[1] / count:>9.1%}"
+              f"{totals[2] / count:>9.2f}{totals[3] / count:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
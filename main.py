@@ -1,23 +1,32 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Header
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 import os
+import hmac
 import logging
 import asyncio
 import json
-from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, Tuple
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
 from jose import JWTError, jwt
-from pymongo import MongoClient
 from bson import ObjectId
 
 # Import our custom modules
 from LegalAIAgent import LegalAIAgent
 from services.document_processor import DocumentProcessor
 from services.image_processor import ImageProcessor
+from services.Client import close_http_client
+from services.session_manager import SessionManager, HISTORY_MAX_MESSAGES
+from services.uploads import RequestSizeLimitMiddleware, MAX_REQUEST_BYTES
+from services.pipeline import StageTimer, run_concurrently
+from services.database import get_database, ensure_indexes, close_mongo_clients
+from services.principals import PrincipalCache, PRINCIPAL_PROJECTION, principal_from_claims
+from services.password_hashing import get_password_hasher
+from services.pagination import DESCENDING, keyset_filter, page
 
 # Load environment variables
 load_dotenv()
@@ -26,11 +35,36 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ensure indexes (and, with EXTRACTION_WARM, spawn extraction workers) before the first request;
+    on shutdown release pooled HTTP/Mongo connections, hashing threads and extraction workers and persist caches
+    """
+    if db is not None:
+        try:
+            await ensure_indexes(db)
+            print("MongoDB connected successfully")
+        except Exception as e:
+            logging.error(f"Failed to connect to MongoDB: {e}")
+    if os.getenv("EXTRACTION_WARM", "false").lower() == "true":
+        await document_processor.extraction_pool.warm()
+
+    yield
+
+    await close_http_client()
+    await close_mongo_clients()
+    password_hasher.shutdown()
+    document_processor.extraction_pool.shutdown()
+    if legal_agent:
+        legal_agent.web_search.cache.flush()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Legal AI Chat API",
     description="API for legal document analysis and chat with AI agent",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -42,37 +76,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized request bodies before multipart parsing spools them
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=MAX_REQUEST_BYTES)
+
 # Initialize processors
 document_processor = DocumentProcessor()
 image_processor = ImageProcessor()
 
 # Database setup
 MONGODB_URI = os.getenv("MONGODB_URI")
-mongo_client: Optional[MongoClient] = None
 db = None
 if MONGODB_URI:
     try:
-        mongo_client = MongoClient(MONGODB_URI)
-        db = mongo_client.get_database()
-        # Ensure indexes
-        db.users.create_index("email", unique=True)
-        db.chats.create_index([("user_id", 1), ("updated_at", -1)])
-        db.messages.create_index([("chat_id", 1), ("timestamp", 1)])
-        print("MongoDB connected successfully")
+        # Shared async client (pool, timeouts and read preference from MONGO_* settings);
+        # it connects lazily, indexes are ensured at startup
+        db = get_database()
     except Exception as e:
         logging.error(f"Failed to connect to MongoDB: {e}")
 
 # Auth config
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = get_password_hasher()
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-secret-change-me")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRES_MINUTES = int(os.getenv("JWT_EXPIRES_MINUTES", "10080"))  # default 7 days
+# Read-only endpoints may take the user from the signed token claims instead of the database
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() == "true"
+principal_cache = PrincipalCache()
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Check a password off the event loop; returns (verified, rehash to store or None)"""
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -80,27 +116,81 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
-def get_current_user(authorization: Optional[str] = None) -> Dict[str, Any]:
+def decode_token_claims(authorization: Optional[str]) -> Dict[str, Any]:
+    """Validate the bearer token and return its claims"""
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing Authorization header")
     scheme, _, token = authorization.partition(" ")
     if scheme.lower() != "bearer" or not token:
         raise HTTPException(status_code=401, detail="Invalid Authorization header")
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid token payload")
-        if db is None:
-            raise HTTPException(status_code=503, detail="Database not available")
-        user = db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        user["id"] = str(user["_id"])  # serialize id
-        return user
+        return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+def token_subject(claims: Dict[str, Any]) -> ObjectId:
+    user_id: str = claims.get("sub")
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+    try:
+        return ObjectId(user_id)
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+
+def decode_access_token(authorization: Optional[str]) -> ObjectId:
+    """Validate the bearer token and return the user id it was issued for"""
+    return token_subject(decode_token_claims(authorization))
+
+async def find_user(user_id: ObjectId) -> Dict[str, Any]:
+    """Load the token's user (from the principal cache when possible), failing if it no longer exists"""
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    user = await db.users.find_one({"_id": user_id}, PRINCIPAL_PROJECTION)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return principal_cache.put(user)
+
+def invalidate_user(user_id: Any):
+    """Call after changing or deleting a user so requests stop seeing the cached principal"""
+    principal_cache.invalidate(user_id)
+
+async def get_current_user(authorization: Optional[str] = None, trust_claims: bool = False) -> Dict[str, Any]:
+    """
+    Resolve the request's user. With `trust_claims` (read-only endpoints,
+    when AUTH_TRUST_TOKEN_CLAIMS is on) the signed token is taken at its
+    word and the user is not looked up at all.
+    """
+    claims = decode_token_claims(authorization)
+    user_id = token_subject(claims)
+    if trust_claims:
+        return principal_from_claims(user_id, claims)
+    return await find_user(user_id)
+
+async def get_owned_chat(
+    chat_id: str,
+    authorization: Optional[str],
+    projection: Optional[Dict[str, Any]] = None,
+    trust_claims: bool = False,
+) -> Dict[str, Any]:
+    """
+    Load a chat of the token's user; 400 for a malformed id, 404 when it
+    isn't theirs. Only read-only endpoints may pass `trust_claims`.
+    """
+    user = await get_current_user(authorization, trust_claims=trust_claims)
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    try:
+        chat_obj_id = ObjectId(chat_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid chat_id")
+    chat = await db.chats.find_one({"_id": chat_obj_id, "user_id": user["_id"]}, projection)
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    return chat
+
 # Serialization helpers
 def serialize_chat(chat: Dict[str, Any]) -> Dict[str, Any]:
     return {
@@ -140,6 +230,21 @@ except Exception as e:
     logger.error(f"Failed to initialize Legal AI Agent: {e}")
     legal_agent = None
 
+async def load_chat_history(chat_id: str) -> List[Dict[str, str]]:
+    """Rebuild a chat's short-term agent history from persisted messages"""
+    if db is None:
+        return []
+
+    cursor = db.messages.find(
+        {"chat_id": ObjectId(chat_id), "role": {"$in": ["user", "assistant"]}},
+        {"role": 1, "content": 1}
+    ).sort("timestamp", -1).limit(HISTORY_MAX_MESSAGES)
+    msgs = await cursor.to_list()
+    return [{"role": m["role"], "content": m.get("content") or ""} for m in reversed(msgs)]
+
+# Per-chat agent sessions (history + actions), bounded LRU
+session_manager = SessionManager(history_loader=load_chat_history)
+
 # Pydantic models
 class ChatRequest(BaseModel):
     message: str
@@ -149,6 +254,7 @@ class ChatResponse(BaseModel):
     success: bool = True
     response: str
     document_text: Optional[str] = None
+    document_truncated: Optional[bool] = None
     image_text: Optional[str] = None
     prompt: str
     word_count: Optional[int] = None
@@ -191,6 +297,7 @@ class ChatSummary(BaseModel):
 class HistoryResponse(BaseModel):
     success: bool = True
     chats: List[ChatSummary]
+    nextCursor: Optional[str] = None
 
 # Health check endpoint
 @app.get("/health", response_model=HealthResponse)
@@ -201,24 +308,51 @@ async def health_check():
         agent_ready=legal_agent is not None
     )
 
+# Runtime metrics (caches, pools)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+@app.get("/metrics")
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Expose in-process cache and pool counters (disabled unless METRICS_TOKEN is set)"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode("utf-8"), METRICS_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    metrics: Dict[str, Any] = {
+        "sessions": session_manager.stats(),
+        "extraction_pool": document_processor.extraction_pool.stats(),
+        "extraction_cache": document_processor.extraction_cache.stats(),
+        "image_extraction": image_processor.stats(),
+        "principal_cache": principal_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+    }
+    if legal_agent:
+        metrics["embedding_cache"] = legal_agent.vector_store.embedding_cache.stats()
+        metrics["web_search"] = legal_agent.web_search.stats()
+        metrics["tool_memo"] = legal_agent.tool_memo.stats()
+        if legal_agent.semantic_cache:
+            metrics["semantic_cache"] = legal_agent.semantic_cache.stats()
+    return metrics
+
 # Auth endpoints
 @app.post("/register", response_model=AuthResponse)
 async def register(payload: RegisterRequest):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     try:
-        existing = db.users.find_one({"email": payload.email.lower()})
+        existing = await db.users.find_one({"email": payload.email.lower()})
         if existing:
             raise HTTPException(status_code=400, detail="Email already registered")
         user_doc = {
             "name": payload.name.strip(),
             "email": payload.email.lower().strip(),
-            "password": hash_password(payload.password),
+            "password": await hash_password(payload.password),
             "created_at": datetime.utcnow().isoformat(),
         }
-        result = db.users.insert_one(user_doc)
+        result = await db.users.insert_one(user_doc)
         user_id = str(result.inserted_id)
-        token = create_access_token({"sub": user_id})
+        token = create_access_token({"sub": user_id, "name": user_doc["name"], "email": user_doc["email"]})
         return AuthResponse(
             token=token,
             user=UserOut(id=user_id, name=user_doc["name"], email=user_doc["email"])
@@ -234,11 +368,18 @@ async def login(payload: LoginRequest):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     try:
-        user = db.users.find_one({"email": payload.email.lower().strip()})
-        if not user or not verify_password(payload.password, user.get("password", "")):
+        user = await db.users.find_one({"email": payload.email.lower().strip()})
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        verified, new_hash = await verify_password(payload.password, user.get("password", ""))
+        if not verified:
             raise HTTPException(status_code=401, detail="Invalid credentials")
+        if new_hash:
+            # BCRYPT_ROUNDS changed since this hash was made: store it at the current cost
+            await db.users.update_one({"_id": user["_id"]}, {"$set": {"password": new_hash}})
+            invalidate_user(user["_id"])
         user_id = str(user["_id"])
-        token = create_access_token({"sub": user_id})
+        token = create_access_token({"sub": user_id, "name": user.get("name", ""), "email": user.get("email", "")})
         return AuthResponse(
             token=token,
             user=UserOut(id=user_id, name=user.get("name", ""), email=user.get("email", ""))
@@ -251,13 +392,16 @@ async def login(payload: LoginRequest):
 
 # Real-time agent actions stream
 @app.get("/chat/actions/stream")
-async def stream_agent_actions():
-    """Stream agent actions in real-time using Server-Sent Events"""
+async def stream_agent_actions(chat_id: str, authorization: Optional[str] = Header(None)):
+    """Stream agent actions of one of the user's chats in real-time using Server-Sent Events"""
+    chat = await get_owned_chat(chat_id, authorization, {"_id": 1}, trust_claims=AUTH_TRUST_TOKEN_CLAIMS)
+    session_key = str(chat["_id"])  # canonical form, as used by /chat
     
     async def event_stream():
         while True:
             if legal_agent:
-                actions = legal_agent.get_agent_actions()
+                session = session_manager.peek(session_key)
+                actions = session.get_agent_actions() if session else []
                 if actions:
                     # Send latest actions
                     yield f"data: {json.dumps(actions)}\n\n"
@@ -274,9 +418,168 @@ async def stream_agent_actions():
         }
     )
 
+async def prepare_chat_turn(
+    message: str,
+    document: Optional[UploadFile],
+    image: Optional[UploadFile],
+    context: Optional[str],
+    chat_id: Optional[str],
+    authorization: Optional[str],
+    timer: StageTimer
+) -> Dict[str, Any]:
+    """
+    Authenticate, extract attachments, build the final prompt, resolve (or
+    create) the chat and load its agent session.
+
+    Once the token's signature is verified, the user/chat lookups and the
+    document/image extractions all run concurrently; the first failure
+    cancels the rest. The user message is persisted in the background
+    (`persist_task`) so it overlaps with the agent call; await it before
+    saving the reply.
+    """
+    with timer.stage("auth"):
+        user_id = decode_access_token(authorization)
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+
+    chat_obj_id: Optional[ObjectId] = None
+    if chat_id:
+        try:
+            chat_obj_id = ObjectId(chat_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid chat_id")
+
+    async def resolve_user_and_chat():
+        async def find_chat():
+            if chat_obj_id is None:
+                return None
+            chat_doc = await db.chats.find_one({"_id": chat_obj_id, "user_id": user_id})
+            if not chat_doc:
+                raise HTTPException(status_code=404, detail="Chat not found")
+            return chat_doc
+
+        user, _ = await run_concurrently(
+            timer.timed("user_lookup", find_user(user_id)),
+            timer.timed("chat_lookup", find_chat())
+        )
+        return user
+
+    async def extract_document():
+        if not document:
+            return None
+        logger.info(f"Processing document: {document.filename}")
+        return await timer.timed("document", document_processor.extract(document))
+
+    async def extract_image():
+        if not image:
+            return None
+        logger.info(f"Processing image: {image.filename}")
+        return await timer.timed("image", image_processor.process_image(image))
+
+    user, extraction, image_text = await run_concurrently(
+        resolve_user_and_chat(), extract_document(), extract_image()
+    )
+
+    document_text = extraction.text if extraction else None
+    document_truncated = extraction.truncated if extraction else None
+    total_word_count = 0
+    if document_text:
+        total_word_count += len(document_text.split())
+    if image_text:
+        total_word_count += len(image_text.split())
+    
+    # Add context word count if provided
+    if context:
+        total_word_count += len(context.split())
+    
+    # Check word limit
+    if total_word_count > 500:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Total content too large ({total_word_count} words). Maximum allowed: 500 words."
+        )
+    
+    # Build final prompt
+    prompt_parts = []
+    
+    if document_text:
+        prompt_parts.append(f"Document content:\n{document_text}")
+    
+    if image_text:
+        prompt_parts.append(f"Image content:\n{image_text}")
+    
+    if context:
+        prompt_parts.append(f"Additional context:\n{context}")
+    
+    if prompt_parts:
+        separator = '\n\n'
+        final_prompt = f"{separator.join(prompt_parts)}\n\nUser question: {message}"
+    else:
+        final_prompt = message
+
+    # New chats get their id up front so the chat insert can run in the background too
+    new_chat_doc = None
+    if chat_obj_id is None:
+        title = (message[:50] + ("..." if len(message) > 50 else "")) or "New conversation"
+        chat_obj_id = ObjectId()
+        new_chat_doc = {
+            "_id": chat_obj_id,
+            "user_id": user["_id"],
+            "title": title,
+            "created_at": datetime.utcnow().isoformat(),
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+
+    # Load this chat's session before persisting the new message so it isn't in the history twice.
+    # Pinned until the turn ends (the caller releases it) so it can't be evicted before the lock is taken
+    with timer.stage("session"):
+        session = await session_manager.get_session(str(chat_obj_id), load_history=new_chat_doc is None, pin=True)
+
+    user_msg_doc = {
+        "chat_id": chat_obj_id,
+        "user_id": user["_id"],
+        "role": "user",
+        "content": message,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+    async def persist_user_message():
+        if new_chat_doc is not None:
+            await db.chats.insert_one(new_chat_doc)
+        await db.messages.insert_one(user_msg_doc)
+
+    persist_task = asyncio.ensure_future(timer.timed("persist_user", persist_user_message()))
+
+    return {
+        "user": user,
+        "document_text": document_text,
+        "document_truncated": document_truncated,
+        "image_text": image_text,
+        "total_word_count": total_word_count,
+        "final_prompt": final_prompt,
+        "chat_obj_id": chat_obj_id,
+        "session": session,
+        "persist_task": persist_task,
+    }
+
+async def save_assistant_message(chat_obj_id: ObjectId, user: Dict[str, Any], response: str):
+    """Persist the assistant reply and bump the chat's updated_at"""
+    assistant_msg_doc = {
+        "chat_id": chat_obj_id,
+        "user_id": user["_id"],
+        "role": "assistant",
+        "content": response,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    await db.messages.insert_one(assistant_msg_doc)
+
+    # Update chat timestamp and title if new
+    await db.chats.update_one({"_id": chat_obj_id}, {"$set": {"updated_at": datetime.utcnow().isoformat()}})
+
 # Unified chat endpoint
 @app.post("/chat", response_model=ChatResponse)
 async def chat_with_agent(
+    http_response: Response,
     message: str = Form(...),
     document: Optional[UploadFile] = File(None),
     image: Optional[UploadFile] = File(None),
@@ -291,125 +594,53 @@ async def chat_with_agent(
     - document: Optional document file (PDF, DOCX, TXT)
     - image: Optional image file (JPG, PNG, BMP, TIFF, WEBP)
     - context: Optional additional text context
+    
+    Per-stage timings are returned in the Server-Timing header.
     """
     
-    # Auth
-    user = get_current_user(authorization)
-
     if not legal_agent:
+        # Still reject bad credentials first
+        decode_access_token(authorization)
         raise HTTPException(status_code=503, detail="Legal AI Agent not available")
     
+    timer = StageTimer()
+    turn = None
     try:
-        # Clear previous agent actions
-        legal_agent.clear_agent_actions()
-        
-        document_text = None
-        image_text = None
-        total_word_count = 0
-        
-        # Process document if provided
-        if document:
-            logger.info(f"Processing document: {document.filename}")
-            document_text = await document_processor.process_document(document)
-            if document_text:
-                total_word_count += len(document_text.split())
-        
-        # Process image if provided
-        if image:
-            logger.info(f"Processing image: {image.filename}")
-            image_text = await image_processor.process_image(image)
-            if image_text:
-                total_word_count += len(image_text.split())
-        
-        # Add context word count if provided
-        if context:
-            total_word_count += len(context.split())
-        
-        # Check word limit
-        if total_word_count > 500:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Total content too large ({total_word_count} words). Maximum allowed: 500 words."
-            )
-        
-        # Build final prompt
-        prompt_parts = []
-        
-        if document_text:
-            prompt_parts.append(f"Document content:\n{document_text}")
-        
-        if image_text:
-            prompt_parts.append(f"Image content:\n{image_text}")
-        
-        if context:
-            prompt_parts.append(f"Additional context:\n{context}")
-        
-        if prompt_parts:
-            separator = '\n\n'
-            final_prompt = f"{separator.join(prompt_parts)}\n\nUser question: {message}"
-        else:
-            final_prompt = message
-        
-        # Persist conversation: create or use existing chat
-        if db is None:
-            raise HTTPException(status_code=503, detail="Database not available")
+        turn = await prepare_chat_turn(message, document, image, context, chat_id, authorization, timer)
+        session = turn["session"]
+        user = turn["user"]
 
-        chat_obj_id: Optional[ObjectId] = None
-        if chat_id:
-            try:
-                chat_obj_id = ObjectId(chat_id)
-            except Exception:
-                raise HTTPException(status_code=400, detail="Invalid chat_id")
-            chat_doc = db.chats.find_one({"_id": chat_obj_id, "user_id": user["_id"]})
-            if not chat_doc:
-                raise HTTPException(status_code=404, detail="Chat not found")
-        else:
-            # Create new chat
-            title = (message[:50] + ("..." if len(message) > 50 else "")) or "New conversation"
-            chat_doc = {
-                "user_id": user["_id"],
-                "title": title,
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
-            }
-            result = db.chats.insert_one(chat_doc)
-            chat_obj_id = result.inserted_id
-
-        # Insert user message
-        user_msg_doc = {
-            "chat_id": chat_obj_id,
-            "user_id": user["_id"],
-            "role": "user",
-            "content": message,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-        db.messages.insert_one(user_msg_doc)
-
-        # Get response from Legal AI Agent
+        # Get response from Legal AI Agent while the user message is written
         logger.info("Sending request to Legal AI Agent")
-        response = legal_agent.chat_with_agent(final_prompt)
+        with timer.stage("agent"):
+            async with session.lock:
+                legal_agent.clear_agent_actions(session)
+                response = await legal_agent.chat_with_agent(
+                    turn["final_prompt"],
+                    session,
+                    cacheable=not (document or image),
+                    context=context
+                )
+                agent_actions = legal_agent.get_agent_actions(session)
+        session_manager.update(session)
         
-        # Insert assistant message
-        assistant_msg_doc = {
-            "chat_id": chat_obj_id,
-            "user_id": user["_id"],
-            "role": "assistant",
-            "content": response,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-        db.messages.insert_one(assistant_msg_doc)
-
-        # Update chat timestamp and title if new
-        db.chats.update_one({"_id": chat_obj_id}, {"$set": {"updated_at": datetime.utcnow().isoformat()}})
+        await turn["persist_task"]
+        await timer.timed(
+            "persist_assistant",
+            save_assistant_message(turn["chat_obj_id"], user, response)
+        )
 
+        logger.info(f"/chat timings: {timer.summary()}")
+        http_response.headers["Server-Timing"] = timer.server_timing()
         return ChatResponse(
             response=response,
-            document_text=document_text,
-            image_text=image_text,
-            prompt=final_prompt,
-            word_count=total_word_count if total_word_count > 0 else None,
-            agent_actions=legal_agent.get_agent_actions(),
-            chat_id=str(chat_obj_id)
+            document_text=turn["document_text"],
+            document_truncated=turn["document_truncated"],
+            image_text=turn["image_text"],
+            prompt=turn["final_prompt"],
+            word_count=turn["total_word_count"] if turn["total_word_count"] > 0 else None,
+            agent_actions=agent_actions,
+            chat_id=str(turn["chat_obj_id"])
         )
         
     except HTTPException:
@@ -417,29 +648,162 @@ async def chat_with_agent(
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        if turn is not None:
+            session_manager.release(turn["session"])
+            # Don't leave the background insert unobserved if the agent call failed
+            if not turn["persist_task"].done():
+                await asyncio.gather(turn["persist_task"], return_exceptions=True)
+
+# Streaming chat endpoint
+@app.post("/chat/stream")
+async def chat_with_agent_stream(
+    message: str = Form(...),
+    document: Optional[UploadFile] = File(None),
+    image: Optional[UploadFile] = File(None),
+    context: Optional[str] = Form(None),
+    chat_id: Optional[str] = Form(None),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Streaming variant of /chat using Server-Sent Events
+
+    Emits `start` (chat id and attachment info), `tool_call`/`tool_result`
+    progress events, `token` events with completion text as it is generated
+    (a `reset` event discards the tokens of an iteration that ended in tool
+    calls), and a closing `done` event carrying the full response, equal to
+    the tokens after the last reset, once it has been persisted.
+
+    The Server-Timing header covers the stages before streaming starts; the
+    full breakdown is logged when the stream ends.
+    """
+    
+    if not legal_agent:
+        # Still reject bad credentials first
+        decode_access_token(authorization)
+        raise HTTPException(status_code=503, detail="Legal AI Agent not available")
+    
+    # Validation and extraction errors are still returned as regular HTTP errors
+    timer = StageTimer()
+    try:
+        turn = await prepare_chat_turn(message, document, image, context, chat_id, authorization, timer)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in chat stream endpoint: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    session = turn["session"]
+    user = turn["user"]
+    server_timing = timer.server_timing()
+    released = False
+
+    async def release_session():
+        # From the generator's finally, or as the response's background task if it never ran
+        nonlocal released
+        if not released:
+            released = True
+            session_manager.release(session)
+
+    async def event_stream():
+        start_event = {
+            "type": "start",
+            "chat_id": str(turn["chat_obj_id"]),
+            "document_text": turn["document_text"],
+            "document_truncated": turn["document_truncated"],
+            "image_text": turn["image_text"],
+            "word_count": turn["total_word_count"] or None,
+        }
+        yield f"data: {json.dumps(start_event)}\n\n"
+
+        logger.info("Streaming request to Legal AI Agent")
+        try:
+            async with session.lock:
+                legal_agent.clear_agent_actions(session)
+                events = legal_agent.stream_chat_with_agent(
+                    turn["final_prompt"],
+                    session,
+                    cacheable=not (document or image),
+                    context=context
+                )
+                with timer.stage("agent"):
+                    async for event in events:
+                        if event["type"] == "done":
+                            # Persist the full message before telling the client we're done
+                            await turn["persist_task"]
+                            await timer.timed(
+                                "persist_assistant",
+                                save_assistant_message(turn["chat_obj_id"], user, event["response"])
+                            )
+                            event["agent_actions"] = legal_agent.get_agent_actions(session)
+                            event["chat_id"] = str(turn["chat_obj_id"])
+                        yield f"data: {json.dumps(event)}\n\n"
+            session_manager.update(session)
+        finally:
+            await release_session()
+            if not turn["persist_task"].done():
+                await asyncio.gather(turn["persist_task"], return_exceptions=True)
+            logger.info(f"/chat/stream timings: {timer.summary()}")
+
+    return StreamingResponse(
+        event_stream(),
+        background=BackgroundTask(release_session),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+            "Server-Timing": server_timing
+        }
+    )
 
 # Clear conversation history
 @app.post("/chat/clear")
-async def clear_conversation():
-    """Clear the conversation history"""
+async def clear_conversation(chat_id: str, authorization: Optional[str] = Header(None)):
+    """Clear the in-memory conversation history of one of the user's chats (persisted messages are kept)"""
+    chat = await get_owned_chat(chat_id, authorization, {"_id": 1})
     
     if not legal_agent:
         raise HTTPException(status_code=503, detail="Legal AI Agent not available")
     
     try:
-        legal_agent.clear_history()
+        # An empty hot session keeps the chat cleared until it is evicted
+        session = await session_manager.get_session(str(chat["_id"]), load_history=False)
+        legal_agent.clear_history(session)
+        session_manager.update(session)
         return {"message": "Conversation history cleared successfully"}
     except Exception as e:
         logger.error(f"Error clearing conversation: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 # History endpoints
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "200"))
+CHAT_LIST_SORT = [("updated_at", DESCENDING), ("_id", DESCENDING)]
+
 @app.get("/history", response_model=HistoryResponse)
-async def get_history(authorization: Optional[str] = Header(None)):
-    user = get_current_user(authorization)
+async def get_history(
+    authorization: Optional[str] = Header(None),
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+):
+    """
+    Chats of the user, most recently updated first, one page at a time.
+
+    Pass the returned `nextCursor` as `cursor` for the next page. `since`
+    (an ISO timestamp, e.g. the newest updatedAt already held) limits the
+    result to chats updated after it, for incremental sidebar sync.
+    """
+    user = await get_current_user(authorization, trust_claims=AUTH_TRUST_TOKEN_CLAIMS)
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
-    chats = list(db.chats.find({"user_id": user["_id"]}).sort("updated_at", -1))
+    query: Dict[str, Any] = {"user_id": user["_id"]}
+    if since:
+        query["updated_at"] = {"$gt": since}
+    if cursor:
+        query.update(keyset_filter(cursor, CHAT_LIST_SORT))
+    found = await db.chats.find(query, {"title": 1, "updated_at": 1}).sort(CHAT_LIST_SORT).limit(limit + 1).to_list()
+    chats, next_cursor = page(found, limit, CHAT_LIST_SORT)
     summaries = [
         ChatSummary(
             id=str(c["_id"]),
@@ -447,29 +811,62 @@ async def get_history(authorization: Optional[str] = Header(None)):
             updatedAt=c.get("updated_at", "")
         ) for c in chats
     ]
-    return HistoryResponse(chats=summaries)
+    return HistoryResponse(chats=summaries, nextCursor=next_cursor)
+
+MESSAGE_PAGE_SIZE = int(os.getenv("HISTORY_MESSAGE_PAGE_SIZE", "50"))
+MESSAGE_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MESSAGE_MAX_PAGE_SIZE", "500"))
+MESSAGE_STREAM_BATCH_SIZE = int(os.getenv("HISTORY_MESSAGE_STREAM_BATCH_SIZE", "100"))
+# Windows are read newest first; a cursor points at the oldest message already returned
+MESSAGE_WINDOW_SORT = [("timestamp", DESCENDING), ("_id", DESCENDING)]
 
 @app.get("/history/{chat_id}")
-async def get_chat_by_id(chat_id: str, authorization: Optional[str] = Header(None)):
-    user = get_current_user(authorization)
-    if db is None:
-        raise HTTPException(status_code=503, detail="Database not available")
-    try:
-        chat_obj_id = ObjectId(chat_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid chat_id")
+async def get_chat_by_id(
+    chat_id: str,
+    authorization: Optional[str] = Header(None),
+    limit: int = Query(MESSAGE_PAGE_SIZE, ge=1, le=MESSAGE_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_structured: bool = False,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+):
+    """
+    Messages of a chat in chronological order.
 
-    chat = db.chats.find_one({"_id": chat_obj_id, "user_id": user["_id"]})
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-    msgs = list(db.messages.find({"chat_id": chat_obj_id}).sort("timestamp", 1))
+    JSON mode (format=json) returns the latest `limit` messages; pass `nextCursor` as
+    `cursor` to load the window before them. format=ndjson streams every
+    message (before `cursor`, if given) one per line straight from the
+    database cursor, after a first line describing the chat.
+    `structured_response` payloads are left out unless `include_structured`.
+    """
+    chat = await get_owned_chat(chat_id, authorization, {"title": 1}, trust_claims=AUTH_TRUST_TOKEN_CLAIMS)
+    query: Dict[str, Any] = {"chat_id": chat["_id"]}
+    if cursor:
+        query.update(keyset_filter(cursor, MESSAGE_WINDOW_SORT))
+    projection = None if include_structured else {"structured_response": 0}
+    chat_info = {"id": str(chat["_id"]), "title": chat.get("title", "Untitled")}
+
+    if response_format == "ndjson":
+        messages = db.messages.find(query, projection).sort([("timestamp", 1), ("_id", 1)]).batch_size(MESSAGE_STREAM_BATCH_SIZE)
+
+        async def ndjson_stream():
+            try:
+                yield json.dumps({"type": "chat", **chat_info}) + "\n"
+                async for msg in messages:
+                    yield json.dumps({"type": "message", **serialize_message(msg)}, default=str) + "\n"
+            finally:
+                await messages.close()
+
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+    found = await db.messages.find(query, projection).sort(MESSAGE_WINDOW_SORT).limit(limit + 1).to_list()
+    msgs, next_cursor = page(found, limit, MESSAGE_WINDOW_SORT)
+    msgs.reverse()
     return {
         "success": True,
         "chat": {
-            "id": str(chat["_id"]),
-            "title": chat.get("title", "Untitled"),
+            **chat_info,
             "messages": [serialize_message(m) for m in msgs],
-        }
+        },
+        "nextCursor": next_cursor,
     }
 
 if __name__ == "__main__":
@@ -1,23 +1,40 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import os
+import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Centralized client configuration
-def get_aiml_client():
-    """Get a configured AIML client instance"""
+AIML_BASE_URL = "https://api.aimlapi.com/v1"
+
+def _get_aiml_api_key() -> str:
     aiml_api_key = os.getenv("AIML_API_KEY")
     if not aiml_api_key:
         raise ValueError("AIML_API_KEY environment variable is not set")
-    
+    return aiml_api_key
+
+# Centralized client configuration
+def get_aiml_client():
+    """Get a configured AIML client instance"""
     return OpenAI(
-        base_url="https://api.aimlapi.com/v1",
-        api_key=aiml_api_key,
+        base_url=AIML_BASE_URL,
+        api_key=_get_aiml_api_key(),
     )
 
-# Create a singleton instance
+def get_async_aiml_client():
+    """Get a configured async AIML client instance backed by the shared HTTP pool"""
+    return AsyncOpenAI(
+        base_url=AIML_BASE_URL,
+        api_key=_get_aiml_api_key(),
+        http_client=get_http_client(),
+        timeout=float(os.getenv("AIML_TIMEOUT_SECONDS", "60")),
+        max_retries=int(os.getenv("AIML_MAX_RETRIES", "2")),
+    )
+
+# Create singleton instances
 _aiml_client = None
+_async_aiml_client = None
+_http_client = None
 
 def get_client():
     """Get the singleton AIML client instance"""
@@ -26,6 +43,44 @@ def get_client():
         _aiml_client = get_aiml_client()
     return _aiml_client
 
+def get_async_client():
+    """Get the singleton async AIML client instance"""
+    global _async_aiml_client
+    if _async_aiml_client is None:
+        _async_aiml_client = get_async_aiml_client()
+    return _async_aiml_client
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared async HTTP client.
+
+    The connection pool is sized through HTTP_MAX_CONNECTIONS and
+    HTTP_MAX_KEEPALIVE_CONNECTIONS so one worker can keep many concurrent
+    LLM round-trips in flight without opening a new connection for each.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+                max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+                keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30")),
+            ),
+            timeout=httpx.Timeout(
+                float(os.getenv("HTTP_TIMEOUT_SECONDS", "60")),
+                connect=float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5")),
+            ),
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared async HTTP client (call on application shutdown)"""
+    global _http_client, _async_aiml_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+    _async_aiml_client = None
+
 # Example usage (can be removed if not needed)
 if __name__ == "__main__":
     try:
@@ -37,4 +92,4 @@ if __name__ == "__main__":
         )
         print(response.choices[0].message.content)
     except Exception as e:
-        print("Error while calling llm:", e)
\ No newline at end of file
+        print("Error while calling llm:", e)
@@ -0,0 +1,78 @@
+import os
+import logging
+from typing import Any, Dict, Optional
+from pymongo import AsyncMongoClient, MongoClient
+
+logger = logging.getLogger(__name__)
+
+# One pooled client per connection string and flavour, shared by the API routes and VectorStore
+_async_clients: Dict[str, AsyncMongoClient] = {}
+_sync_clients: Dict[str, MongoClient] = {}
+
+
+def client_options() -> Dict[str, Any]:
+    """Pool, timeout and read-preference settings shared by every Mongo client"""
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+        "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+        "socketTimeoutMS": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        # Reads that may lag the primary (history, vector search) can go to secondaries
+        "readPreference": os.getenv("MONGO_READ_PREFERENCE", "primaryPreferred"),
+        "appname": os.getenv("MONGO_APP_NAME", "legal-ai-chat"),
+    }
+
+
+def _resolve_uri(uri: Optional[str]) -> str:
+    uri = uri or os.getenv("MONGODB_URI")
+    if not uri:
+        raise ValueError("MONGODB_URI is not set")
+    return uri
+
+
+def get_async_mongo_client(uri: Optional[str] = None) -> AsyncMongoClient:
+    """Get the shared AsyncMongoClient for `uri` (defaults to MONGODB_URI)"""
+    uri = _resolve_uri(uri)
+    client = _async_clients.get(uri)
+    if client is None:
+        client = AsyncMongoClient(uri, **client_options())
+        _async_clients[uri] = client
+    return client
+
+
+def get_sync_mongo_client(uri: Optional[str] = None) -> MongoClient:
+    """Blocking client with the same settings, for CLIs and snapshot exports"""
+    uri = _resolve_uri(uri)
+    client = _sync_clients.get(uri)
+    if client is None:
+        client = MongoClient(uri, **client_options())
+        _sync_clients[uri] = client
+    return client
+
+
+def get_database(name: Optional[str] = None, uri: Optional[str] = None):
+    """Async database handle: `name`, or the default database of the connection string"""
+    client = get_async_mongo_client(uri)
+    return client[name] if name else client.get_database()
+
+
+async def ensure_indexes(db):
+    """Create the indexes the API relies on"""
+    await db.users.create_index("email", unique=True)
+    # Keyset pagination of /history walks (updated_at, _id) within a user
+    await db.chats.create_index([("user_id", 1), ("updated_at", -1), ("_id", -1)])
+    # Serves the session history loader and /history/{chat_id} windows on (timestamp, _id)
+    await db.messages.create_index([("chat_id", 1), ("timestamp", 1), ("_id", 1)])
+
+
+async def close_mongo_clients():
+    """Close every pooled client"""
+    for client in _async_clients.values():
+        await client.close()
+    _async_clients.clear()
+    for client in _sync_clients.values():
+        client.close()
+    _sync_clients.clear()
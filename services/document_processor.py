@@ -1,23 +1,56 @@
 import os
+import asyncio
 import tempfile
 import logging
 from typing import Optional
 from fastapi import UploadFile, HTTPException
-import PyPDF2
-from docx import Document
-import io
+from services.extraction_pool import ExtractionPool, get_extraction_pool
+from services.uploads import scan_upload
+from services.extraction_cache import ExtractionCache, get_extraction_cache
+from services.text_extraction import (
+    ExtractionResult,
+    UploadSource,
+    extract_pdf_text,
+    extract_docx_text,
+    extract_txt_text,
+    extract_pdf_excerpt,
+    extract_docx_excerpt,
+    take_words,
+)
 
 logger = logging.getLogger(__name__)
 
+MAX_DOCUMENT_WORDS = 500
+
 class DocumentProcessor:
     """Process various document formats and extract text content"""
     
-    def __init__(self):
+    # Bump when extraction or cleaning output changes so cached extractions are not reused
+    EXTRACTOR_VERSION = "1"
+    
+    def __init__(
+        self,
+        extraction_pool: Optional[ExtractionPool] = None,
+        extraction_cache: Optional[ExtractionCache] = None
+    ):
         self.supported_formats = {
             'pdf': self._process_pdf,
             'docx': self._process_docx,
             'txt': self._process_txt
         }
+        # CPU-bound parsers run in worker processes so they don't block the event loop
+        self.pooled_extractors = {
+            'pdf': ('PDF', extract_pdf_excerpt),
+            'docx': ('DOCX', extract_docx_excerpt),
+        }
+        self.extraction_pool = extraction_pool or get_extraction_pool()
+        self.extraction_cache = extraction_cache or get_extraction_cache()
+        # Byte limits enforced while the upload is read
+        self.max_file_sizes = {
+            'pdf': int(os.getenv("MAX_PDF_BYTES", str(25 * 1024 * 1024))),
+            'docx': int(os.getenv("MAX_DOCX_BYTES", str(10 * 1024 * 1024))),
+            'txt': int(os.getenv("MAX_TXT_BYTES", str(2 * 1024 * 1024))),
+        }
     
     async def process_document(self, file: UploadFile) -> Optional[str]:
         """
@@ -29,6 +62,19 @@ class DocumentProcessor:
         Returns:
             Extracted text content or None if processing failed
         """
+        result = await self.extract(file)
+        return result.text
+    
+    async def extract(self, file: UploadFile, max_words: int = MAX_DOCUMENT_WORDS) -> ExtractionResult:
+        """
+        Extract at most `max_words` words from an uploaded document
+        
+        Pages are parsed lazily and parsing stops once the budget is reached,
+        so long filings don't pay for pages that would be cut anyway.
+        
+        Returns:
+            ExtractionResult with the cleaned text ("..." appended when truncated)
+        """
         try:
             # Validate file
             if not file.filename:
@@ -43,24 +89,48 @@ class DocumentProcessor:
                     detail=f"Unsupported file format: {file_extension}. Supported: {', '.join(self.supported_formats.keys())}"
                 )
             
-            # Read file content
-            content = await file.read()
-            if not content:
-                raise HTTPException(status_code=400, detail="Empty file")
+            # Hash the upload in chunks, rejecting it as soon as it exceeds the type's limit
+            with await scan_upload(file, self.max_file_sizes[file_extension], label="Document") as upload:
+                if not upload.size:
+                    raise HTTPException(status_code=400, detail="Empty file")
+                
+                # Same bytes, same extractor: reuse the earlier extraction
+                extractor_version = f"document:{self.EXTRACTOR_VERSION}:{file_extension}:{max_words}"
+                cache_key = self.extraction_cache.make_key(extractor_version, upload.sha256)
+                cached = await asyncio.to_thread(self.extraction_cache.get, cache_key)
+                if cached is not None:
+                    logger.info(f"Reusing cached extraction for {file.filename}")
+                    return cached
+                
+                # Process based on file type (workers open uploads spooled to disk by path instead of copying bytes)
+                if file_extension in self.pooled_extractors:
+                    label, extractor = self.pooled_extractors[file_extension]
+                    try:
+                        result = await self.extraction_pool.run(extractor, upload.source, max_words)
+                    except HTTPException:
+                        raise
+                    except Exception as e:
+                        logger.error(f"{label} processing error: {e}")
+                        raise Exception(f"Failed to process {label}: {str(e)}")
+                else:
+                    processor = self.supported_formats[file_extension]
+                    result = take_words([processor(upload.source)], max_words)
             
-            # Process based on file type
-            processor = self.supported_formats[file_extension]
-            text = processor(content)
-            
-            if not text or not text.strip():
+            if not result.text or not result.text.strip():
                 raise HTTPException(status_code=400, detail="No text content found in document")
             
-            # Clean and limit text
-            cleaned_text = self._clean_text(text)
-            limited_text = self._limit_words(cleaned_text, max_words=500)
+            # Clean text; truncated excerpts are joined into one line ending in "..."
+            cleaned_text = self._clean_text(result.text)
+            if result.truncated:
+                cleaned_text = ' '.join(cleaned_text.split()) + "..."
             
-            logger.info(f"Successfully processed {file.filename}: {len(limited_text.split())} words")
-            return limited_text
+            logger.info(
+                f"Successfully processed {file.filename}: {len(cleaned_text.split())} words"
+                f"{' (truncated)' if result.truncated else ''}"
+            )
+            extraction = ExtractionResult(cleaned_text, result.truncated)
+            await asyncio.to_thread(self.extraction_cache.put, cache_key, extraction)
+            return extraction
             
         except HTTPException:
             raise
@@ -72,53 +142,26 @@ class DocumentProcessor:
         """Extract file extension from filename"""
         return filename.lower().split('.')[-1] if '.' in filename else ''
     
-    def _process_pdf(self, content: bytes) -> str:
+    def _process_pdf(self, content: UploadSource) -> str:
         """Extract text from PDF content"""
         try:
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            
-            return text.strip()
+            return extract_pdf_text(content)
         except Exception as e:
             logger.error(f"PDF processing error: {e}")
             raise Exception(f"Failed to process PDF: {str(e)}")
     
-    def _process_docx(self, content: bytes) -> str:
+    def _process_docx(self, content: UploadSource) -> str:
         """Extract text from DOCX content"""
         try:
-            docx_file = io.BytesIO(content)
-            doc = Document(docx_file)
-            
-            text = ""
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text += paragraph.text + "\n"
-            
-            return text.strip()
+            return extract_docx_text(content)
         except Exception as e:
             logger.error(f"DOCX processing error: {e}")
             raise Exception(f"Failed to process DOCX: {str(e)}")
     
-    def _process_txt(self, content: bytes) -> str:
+    def _process_txt(self, content: UploadSource) -> str:
         """Extract text from TXT content"""
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-            
-            for encoding in encodings:
-                try:
-                    text = content.decode(encoding)
-                    return text.strip()
-                except UnicodeDecodeError:
-                    continue
-            
-            raise Exception("Could not decode text file with any supported encoding")
+            return extract_txt_text(content)
         except Exception as e:
             logger.error(f"TXT processing error: {e}")
             raise Exception(f"Failed to process TXT: {str(e)}")
@@ -139,14 +182,3 @@ class DocumentProcessor:
                 cleaned_lines.append(cleaned_line)
         
         return '\n'.join(cleaned_lines)
-    
-    def _limit_words(self, text: str, max_words: int = 500) -> str:
-        """Limit text to maximum number of words"""
-        words = text.split()
-        
-        if len(words) <= max_words:
-            return text
-        
-        # Truncate to max_words and add ellipsis
-        limited_words = words[:max_words]
-        return ' '.join(limited_words) + "..."
@@ -0,0 +1,160 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing/embedding (unicode form and whitespace)"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: an in-process LRU in front of a SQLite file.
+
+    Entries are keyed by model name + hash of the normalized text and stored
+    as float32 blobs, so a 1536-dim vector costs ~6KB instead of ~50KB as a
+    list of Python floats. Set EMBEDDING_CACHE_PATH to an empty string to
+    disable the on-disk tier.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_disk_entries: Optional[int] = None,
+    ):
+        self.path = path if path is not None else os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+        self.max_disk_entries = max_disk_entries or int(os.getenv("EMBEDDING_CACHE_DISK_MAX_ENTRIES", "200000"))
+
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_writes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.path:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Embedding cache disk tier disabled: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Cache key for a model/text pair"""
+        return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Get a cached embedding or None"""
+        return self.get_many(model, [text]).get(text)
+
+    def get_many(self, model: str, texts: Iterable[str]) -> Dict[str, List[float]]:
+        """Get cached embeddings for several texts; missing texts are left out"""
+        found: Dict[str, List[float]] = {}
+        pending: Dict[str, List[str]] = {}
+
+        with self._lock:
+            for text in texts:
+                key = self.make_key(model, text)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    found[text] = vector.tolist()
+                else:
+                    pending.setdefault(key, []).append(text)
+
+            if pending and self._db is not None:
+                keys = list(pending)
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array("f")
+                        vector.frombytes(blob)
+                        self._remember(key, vector)
+                        for text in pending.pop(key):
+                            self.disk_hits += 1
+                            found[text] = vector.tolist()
+
+            self.misses += sum(len(group) for group in pending.values())
+
+        return found
+
+    def put(self, model: str, text: str, embedding: List[float]):
+        """Store an embedding in both tiers"""
+        self.put_many(model, {text: embedding})
+
+    def put_many(self, model: str, embeddings: Dict[str, List[float]]):
+        """Store several embeddings in both tiers"""
+        rows = []
+        now = time.time()
+        with self._lock:
+            for text, embedding in embeddings.items():
+                key = self.make_key(model, text)
+                vector = array("f", embedding)
+                self._remember(key, vector)
+                rows.append((key, model, vector.tobytes(), now))
+
+            if self._db is not None and rows:
+                try:
+                    self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+                    self._disk_writes += len(rows)
+                    if self._disk_writes >= 1000:
+                        self._disk_writes = 0
+                        self._trim_disk()
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Embedding cache write failed: {e}")
+
+    def _remember(self, key: str, vector: array):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _trim_disk(self):
+        # Drop the oldest rows once the disk tier outgrows its cap
+        self._db.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,139 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+from services.text_extraction import ExtractionResult
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of extracted upload text.
+
+    Entries are keyed by the SHA-256 of the upload bytes plus the extractor
+    version, so re-uploading the same contract or screenshot skips parsing,
+    OCR and vision calls. Bumping an extractor's version (or changing the
+    settings folded into it) naturally misses old entries. Rows live in a
+    SQLite file (in memory when EXTRACTION_CACHE_PATH is empty). The least
+    recently used rows are evicted past EXTRACTION_CACHE_MAX_ENTRIES.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = path if path is not None else os.getenv("EXTRACTION_CACHE_PATH", ".cache/extractions.sqlite3")
+        self.max_entries = max_entries or int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "20000"))
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        # key -> last read time; recency is written in batches instead of on every hit
+        self._touched: Dict[str, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+        target = self.path or ":memory:"
+        try:
+            directory = os.path.dirname(self.path) if self.path else ""
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(target, check_same_thread=False)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Extraction cache file unavailable, using memory: {e}")
+            self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        if target != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # A lost last commit only costs a cache miss; skip the fsync per commit
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            "key TEXT PRIMARY KEY, text TEXT NOT NULL, truncated INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(extractor_version: str, content_sha256: str) -> str:
+        """Cache key for an upload digest and extractor version"""
+        return hashlib.sha256(f"{extractor_version}\0{content_sha256}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[ExtractionResult]:
+        """
+        Get a cached extraction (and mark it recently used) or None.
+
+        Blocking SQLite I/O: call from async code via asyncio.to_thread.
+        """
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT text, truncated FROM extractions WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._touched[key] = time.time()
+                if len(self._touched) >= 100:
+                    self._flush_touched()
+                    self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Extraction cache read failed: {e}")
+                self.misses += 1
+                return None
+            self.hits += 1
+            return ExtractionResult(row[0], bool(row[1]))
+
+    def put(self, key: str, result: ExtractionResult):
+        """Store an extraction (blocking, like `get`)"""
+        with self._lock:
+            try:
+                self._flush_touched()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)",
+                    (key, result.text, int(result.truncated), time.time())
+                )
+                self._writes += 1
+                if self._writes >= 100:
+                    self._writes = 0
+                    self._trim()
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Extraction cache write failed: {e}")
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE extractions SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _trim(self):
+        # Evict the least recently used rows once the cache outgrows its cap
+        self._db.execute(
+            "DELETE FROM extractions WHERE key IN ("
+            "SELECT key FROM extractions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters"""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Get the shared extraction cache"""
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = ExtractionCache()
+    return _extraction_cache
@@ -0,0 +1,146 @@
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionPool:
+    """
+    Bounded process pool for CPU-bound document parsing.
+
+    Jobs beyond `max_pending` in flight are rejected with 503 instead of
+    queueing without limit. A job that exceeds the timeout fails with 504.
+    Its worker cannot be interrupted, so the pool is replaced and the old
+    workers are terminated. Other jobs that were running on the old pool
+    are retried once on the new pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        job_timeout: Optional[float] = None,
+    ):
+        # Small fixed default: each worker is a full interpreter, and cpu_count() reports host
+        # cores on containers/dynos
+        self.max_workers = max_workers or int(os.getenv("EXTRACTION_WORKERS", "2"))
+        self.max_pending = max_pending or int(os.getenv("EXTRACTION_MAX_PENDING", str(self.max_workers * 4)))
+        self.job_timeout = job_timeout or float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "30"))
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight = 0
+
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs threads (uvicorn, thread pools) is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _replace_executor(self, executor: ProcessPoolExecutor):
+        """Drop a pool with a hung worker and terminate its processes"""
+        if self._executor is executor:
+            self._executor = None
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker"""
+        return max(0, self._inflight - self.max_workers)
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Run `func(*args)` in a worker process"""
+        if self._inflight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Document processing queue is full, please retry shortly")
+
+        self._inflight += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    result = await asyncio.wait_for(
+                        loop.run_in_executor(executor, func, *args),
+                        timeout=self.job_timeout
+                    )
+                    self.completed += 1
+                    return result
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    logger.error(f"Extraction job timed out after {self.job_timeout}s; recycling worker pool")
+                    self._replace_executor(executor)
+                    raise HTTPException(status_code=504, detail="Document processing timed out")
+                except BrokenProcessPool:
+                    # Pool was recycled under us (or a worker crashed): retry once on a fresh pool
+                    self._replace_executor(executor)
+                    if attempt == 1:
+                        raise
+            raise RuntimeError("unreachable")
+        except HTTPException:
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._inflight -= 1
+            self.total_seconds += time.perf_counter() - started
+
+    async def warm(self):
+        """Start the worker processes ahead of the first upload (otherwise they spawn on first use)"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, abs, 0) for _ in range(self.max_workers)))
+
+    def stats(self) -> Dict[str, float]:
+        """Queue and job counters"""
+        finished = self.completed + self.failed + self.timeouts
+        return {
+            "workers": self.max_workers,
+            "in_flight": self._inflight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "avg_job_seconds": round(self.total_seconds / finished, 4) if finished else 0.0,
+        }
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_extraction_pool: Optional[ExtractionPool] = None
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Get the shared extraction pool"""
+    global _extraction_pool
+    if _extraction_pool is None:
+        _extraction_pool = ExtractionPool()
+    return _extraction_pool
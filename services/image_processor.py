@@ -1,20 +1,73 @@
 import os
+import io
+import time
+import asyncio
 import logging
-from typing import Optional
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
 from fastapi import UploadFile, HTTPException
-import io
 from PIL import Image
 import pytesseract
-from services.Client import get_client
+from services.Client import get_async_client
+from services.uploads import ScannedUpload, scan_upload
+from services.ocr_preprocessing import (
+    OCR_PREPROCESS,
+    OCR_PSM,
+    OCR_OEM,
+    image_entropy,
+    preprocess_for_ocr,
+    tesseract_config,
+)
+from services.extraction_cache import ExtractionCache, get_extraction_cache
+from services.text_extraction import ExtractionResult
+from services.vision_payload import prepare_vision_images
 
 logger = logging.getLogger(__name__)
 
+# How OCR and AI vision are combined:
+#   sequential - OCR first, vision only when OCR finds (almost) no text
+#   race       - always start both, keep the better result and cancel the other
+#   auto       - race when the image looks hard for OCR (busy/photographic or small), else sequential
+EXTRACTION_POLICIES = {"sequential", "race", "auto"}
+
+# OCR output shorter than this is treated as a failed read
+OCR_MIN_CHARS = 10
+
 class ImageProcessor:
     """Process images and extract text content using OCR and AI vision"""
     
-    def __init__(self):
+    # Bump when OCR/vision output changes so cached extractions are not reused
+    EXTRACTOR_VERSION = "1"
+    
+    def __init__(self, extraction_cache: Optional[ExtractionCache] = None):
         self.supported_formats = {'jpg', 'jpeg', 'png', 'bmp', 'tiff', 'webp'}
-        self.max_file_size = 10 * 1024 * 1024  # 10MB
+        self.max_file_size = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))  # 10MB
+        self.extraction_cache = extraction_cache or get_extraction_cache()
+        
+        # Racing starts paid vision calls, so operators opt in with race/auto
+        self.extraction_policy = os.getenv("IMAGE_EXTRACTION_POLICY", "sequential").lower()
+        if self.extraction_policy not in EXTRACTION_POLICIES:
+            logger.warning(f"Unknown IMAGE_EXTRACTION_POLICY {self.extraction_policy!r}, using sequential")
+            self.extraction_policy = "sequential"
+        self.race_entropy_threshold = float(os.getenv("OCR_RACE_ENTROPY_THRESHOLD", "6.0"))
+        self.race_min_dimension = int(os.getenv("OCR_RACE_MIN_DIMENSION", "600"))
+        self.ocr_timeout = float(os.getenv("OCR_TIMEOUT_SECONDS", "30"))
+        
+        # Latency and cost counters
+        self.runs: Counter = Counter()          # ocr / vision executions started
+        self.cancelled: Counter = Counter()     # ocr / vision executions cancelled by a race
+        self.seconds: Counter = Counter()       # total seconds of completed ocr / vision executions
+        self.completed: Counter = Counter()
+        self.race_wins: Counter = Counter()
+        self.races = 0
+        self.vision_prompt_tokens = 0
+        self.vision_completion_tokens = 0
+        self.vision_upload_bytes = 0
+        self.vision_original_bytes = 0
+    
+    def _extractor_version(self) -> str:
+        """Extractor identity for the cache, including settings that change OCR output"""
+        return f"image:{self.EXTRACTOR_VERSION}:pre={int(OCR_PREPROCESS)}:psm={OCR_PSM}:oem={OCR_OEM}"
     
     async def process_image(self, file: UploadFile) -> Optional[str]:
         """
@@ -40,20 +93,20 @@ class ImageProcessor:
                     detail=f"Unsupported image format: {file_extension}. Supported: {', '.join(self.supported_formats)}"
                 )
             
-            # Read file content
-            content = await file.read()
-            if not content:
-                raise HTTPException(status_code=400, detail="Empty file")
-            
-            # Check file size
-            if len(content) > self.max_file_size:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"File too large ({len(content) / 1024 / 1024:.1f}MB). Maximum allowed: {self.max_file_size / 1024 / 1024}MB"
-                )
-            
-            # Process image
-            text = await self._extract_text_from_image(content)
+            # Hash the upload in chunks, rejecting it as soon as it exceeds the size limit
+            with await scan_upload(file, self.max_file_size, label="Image") as upload:
+                if not upload.size:
+                    raise HTTPException(status_code=400, detail="Empty file")
+                
+                # Same bytes, same extractor: skip OCR and vision
+                cache_key = self.extraction_cache.make_key(self._extractor_version(), upload.sha256)
+                cached = await asyncio.to_thread(self.extraction_cache.get, cache_key)
+                if cached is not None:
+                    logger.info(f"Reusing cached extraction for {file.filename}")
+                    return cached.text
+                
+                # Process image
+                text, cacheable = await self._extract_text_from_image(upload)
             
             if not text or not text.strip():
                 raise HTTPException(status_code=400, detail="No text content found in image")
@@ -62,6 +115,11 @@ class ImageProcessor:
             cleaned_text = self._clean_text(text)
             limited_text = self._limit_words(cleaned_text, max_words=500)
             
+            if cacheable:
+                await asyncio.to_thread(
+                    self.extraction_cache.put, cache_key, ExtractionResult(limited_text, limited_text != cleaned_text)
+                )
+            
             logger.info(f"Successfully processed {file.filename}: {len(limited_text.split())} words")
             return limited_text
             
@@ -75,53 +133,169 @@ class ImageProcessor:
         """Extract file extension from filename"""
         return filename.lower().split('.')[-1] if '.' in filename else ''
     
-    async def _extract_text_from_image(self, image_content: bytes) -> str:
-        """Extract text from image using OCR and AI vision"""
+    async def _extract_text_from_image(self, upload: ScannedUpload) -> Tuple[str, bool]:
+        """
+        Extract text from image using OCR and AI vision
+        
+        Returns:
+            (text, cacheable); minimal OCR text without a vision answer may be
+            a transient vision failure, so it is not cached
+        """
         try:
+            if self.extraction_policy == "race" or (
+                self.extraction_policy == "auto" and await asyncio.to_thread(self._predict_poor_ocr, upload)
+            ):
+                return await self._race_ocr_and_vision(upload)
+            
             # First try OCR
-            ocr_text = self._extract_text_ocr(image_content)
+            ocr_text = await self._extract_text_ocr(upload)
             
             # If OCR fails or returns minimal text, try AI vision
-            if not ocr_text or len(ocr_text.strip()) < 10:
+            if len(ocr_text.strip()) < OCR_MIN_CHARS:
                 logger.info("OCR returned minimal text, trying AI vision")
-                ai_text = await self._extract_text_ai_vision(image_content)
+                ai_text = await self._extract_text_ai_vision(upload)
                 
                 if ai_text and len(ai_text.strip()) > len(ocr_text.strip()):
-                    return ai_text
+                    return ai_text, True
+                return ocr_text, bool(ai_text)
             
-            return ocr_text
+            return ocr_text, True
             
         except Exception as e:
             logger.error(f"Text extraction error: {e}")
             raise Exception(f"Failed to extract text from image: {str(e)}")
     
-    def _extract_text_ocr(self, image_content: bytes) -> str:
-        """Extract text using OCR (Tesseract)"""
+    def _predict_poor_ocr(self, upload: ScannedUpload) -> bool:
+        """Cheap guess whether Tesseract will struggle: busy/photographic content or low resolution"""
         try:
-            # Open image
-            image = Image.open(io.BytesIO(image_content))
+            with upload.open() as stream:
+                image = Image.open(stream)
+                width, height = image.size  # before draft(), which shrinks the reported size
+                image.draft("L", (512, 512))  # JPEG: decode at reduced size
+                entropy = image_entropy(image)
+        except Exception as e:
+            logger.warning(f"Could not analyze image for OCR policy: {e}")
+            return False
+        return entropy >= self.race_entropy_threshold or min(width, height) < self.race_min_dimension
+    
+    async def _race_ocr_and_vision(self, upload: ScannedUpload) -> Tuple[str, bool]:
+        """
+        Run OCR and AI vision concurrently
+        
+        A vision answer wins as soon as it arrives; OCR wins if it finishes
+        first with usable text. The other branch is cancelled (the Tesseract
+        process is killed, the vision request aborted).
+        """
+        self.races += 1
+        tasks = {
+            asyncio.create_task(self._extract_text_ocr(upload)): "ocr",
+            asyncio.create_task(self._extract_text_ai_vision(upload)): "vision",
+        }
+        results: Dict[str, str] = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[tasks[task]] = task.result()
+                
+                vision_text = results.get("vision")
+                ocr_text = results.get("ocr")
+                if vision_text and len(vision_text.strip()) > len((ocr_text or "").strip()):
+                    self.race_wins["vision"] += 1
+                    return vision_text, True
+                if ocr_text is not None and len(ocr_text.strip()) >= OCR_MIN_CHARS:
+                    self.race_wins["ocr"] += 1
+                    return ocr_text, True
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
+            # Both finished without a usable vision answer: keep whatever OCR found
+            self.race_wins["ocr"] += 1
+            return results.get("ocr", ""), bool(results.get("vision"))
+        finally:
+            for task in pending:
+                task.cancel()
+                self.cancelled[tasks[task]] += 1
+    
+    def _prepare_ocr_input(self, upload: ScannedUpload) -> bytes:
+        """Preprocess the image and encode it as PNG for Tesseract's stdin"""
+        # Open image straight from the upload
+        with upload.open() as stream:
+            image = Image.open(stream)
+            
+            if OCR_PREPROCESS:
+                # Downscale, grayscale, binarize and deskew before OCR
+                image = preprocess_for_ocr(image)
+            elif image.mode != 'RGB':
+                # Convert to RGB if necessary
                 image = image.convert('RGB')
             
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+        return buffer.getvalue()
+    
+    async def _run_tesseract(self, image_png: bytes) -> str:
+        """Run Tesseract as a subprocess; cancelling the caller kills the process"""
+        process = await asyncio.create_subprocess_exec(
+            pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", *tesseract_config().split(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(image_png), timeout=self.ocr_timeout)
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        if process.returncode:
+            raise RuntimeError(f"tesseract exited with {process.returncode}: {stderr.decode(errors='replace').strip()}")
+        return stdout.decode("utf-8", errors="replace")
+    
+    async def _extract_text_ocr(self, upload: ScannedUpload) -> str:
+        """Extract text using OCR (Tesseract)"""
+        self.runs["ocr"] += 1
+        started = time.perf_counter()
+        cancelled = False
+        try:
+            image_png = await asyncio.to_thread(self._prepare_ocr_input, upload)
+            
             # Extract text using Tesseract
-            text = pytesseract.image_to_string(image)
+            text = await self._run_tesseract(image_png)
             
             return text.strip()
             
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
         except Exception as e:
             logger.error(f"OCR error: {e}")
             return ""
+        finally:
+            if not cancelled:
+                self._record_latency("ocr", started)
+    
+    def _prepare_vision_payload(self, upload: ScannedUpload):
+        """Resized, re-encoded (and, for tall scans, tiled) image parts"""
+        with upload.open() as stream:
+            return prepare_vision_images(stream)
     
-    async def _extract_text_ai_vision(self, image_content: bytes) -> str:
+    async def _extract_text_ai_vision(self, upload: ScannedUpload) -> str:
         """Extract text using AI vision (OpenAI GPT-4 Vision)"""
+        self.runs["vision"] += 1
+        started = time.perf_counter()
+        cancelled = False
         try:
-            client = get_client()
+            client = get_async_client()
+            
+            # Shrink to the model's effective resolution instead of uploading the original
+            parts = await asyncio.to_thread(self._prepare_vision_payload, upload)
+            self.vision_original_bytes += upload.size
+            self.vision_upload_bytes += sum(len(part.data) for part in parts)
             
-            # Convert image to base64
-            import base64
-            image_base64 = base64.b64encode(image_content).decode('utf-8')
+            instruction = "Extract all text content from this image. If there are legal documents, contracts, or forms, extract all text including headers, body text, and any fine print. Return only the extracted text without any additional commentary."
+            if len(parts) > 1:
+                instruction += f" The image is split into {len(parts)} slightly overlapping sections in reading order; do not repeat text that appears in two sections."
             
             # Create vision prompt
             messages = [
@@ -130,32 +304,69 @@ class ImageProcessor:
                     "content": [
                         {
                             "type": "text",
-                            "text": "Extract all text content from this image. If there are legal documents, contracts, or forms, extract all text including headers, body text, and any fine print. Return only the extracted text without any additional commentary."
+                            "text": instruction
                         },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{image_base64}"
+                        *[
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": part.data_url(),
+                                    "detail": "high"
+                                }
                             }
-                        }
+                            for part in parts
+                        ]
                     ]
                 }
             ]
             
             # Call AI vision API
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model="gpt-4o-mini",  # Use vision-capable model
                 messages=messages,
                 max_tokens=1000,
                 temperature=0.1
             )
             
+            if response.usage:
+                self.vision_prompt_tokens += response.usage.prompt_tokens or 0
+                self.vision_completion_tokens += response.usage.completion_tokens or 0
+            
             text = response.choices[0].message.content
             return text.strip() if text else ""
             
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
         except Exception as e:
             logger.error(f"AI vision error: {e}")
             return ""
+        finally:
+            if not cancelled:
+                self._record_latency("vision", started)
+    
+    def _record_latency(self, branch: str, started: float):
+        # Only executions that ran to completion count towards average latency
+        self.completed[branch] += 1
+        self.seconds[branch] += time.perf_counter() - started
+    
+    def stats(self) -> Dict[str, Any]:
+        """OCR/vision latency, race outcome and vision cost counters"""
+        return {
+            "policy": self.extraction_policy,
+            "runs": dict(self.runs),
+            "cancelled": dict(self.cancelled),
+            "avg_seconds": {
+                branch: round(self.seconds[branch] / count, 4)
+                for branch, count in self.completed.items() if count
+            },
+            "races": self.races,
+            "race_wins": dict(self.race_wins),
+            "vision_prompt_tokens": self.vision_prompt_tokens,
+            "vision_completion_tokens": self.vision_completion_tokens,
+            "vision_upload_bytes": self.vision_upload_bytes,
+            "vision_original_bytes": self.vision_original_bytes,
+        }
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize extracted text"""
@@ -0,0 +1,241 @@
+"""
+Bulk ingestion pipeline for the country knowledge base (country_db.country_embeddings)
+
+Usage:
+    python -m services.ingestion --country Pakistan statutes/pakistan/ [more files or dirs]
+
+Each source document is extracted, cleaned, split into overlapping word
+chunks, and the chunks whose content hash changed are embedded in batches
+and upserted with bulk_write. Completed documents are recorded in a JSON
+checkpoint together with their file hash, so an interrupted run resumes
+where it stopped and unchanged documents are skipped on re-index.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne, DeleteMany
+
+from services.Client import get_client
+from services.database import get_sync_mongo_client
+from services.document_processor import DocumentProcessor
+from services.embedding_cache import normalize_text
+from VectorStore import EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_words(text: str, chunk_size: int = 300, overlap: int = 50) -> List[str]:
+    """Split text into chunks of `chunk_size` words overlapping by `overlap` words"""
+    words = text.split()
+    if not words:
+        return []
+    step = max(chunk_size - overlap, 1)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_size]))
+        if start + chunk_size >= len(words):
+            break
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a chunk's content"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IngestionCheckpoint:
+    """JSON checkpoint of completed documents: {country: {source: file_hash}}"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.completed: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.completed = json.load(f)
+
+    def is_done(self, country: str, source: str, file_hash: str) -> bool:
+        return self.completed.get(country, {}).get(source) == file_hash
+
+    def mark_done(self, country: str, source: str, file_hash: str):
+        with self._lock:
+            self.completed.setdefault(country, {})[source] = file_hash
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.completed, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class KnowledgeBaseIngestor:
+    """Streams source documents into the country_embeddings collection"""
+
+    def __init__(
+        self,
+        collection,
+        checkpoint: IngestionCheckpoint,
+        chunk_size: int = 300,
+        chunk_overlap: int = 50,
+        concurrency: int = 4,
+    ):
+        self.collection = collection
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.concurrency = concurrency
+        self.document_processor = DocumentProcessor()
+        self.stats = {"documents": 0, "skipped_documents": 0, "failed_documents": 0,
+                      "chunks_embedded": 0, "chunks_unchanged": 0, "chunks_deleted": 0}
+        self._stats_lock = threading.Lock()
+
+        # Partial so documents loaded by earlier ad-hoc scripts (without source) don't collide
+        self.collection.create_index(
+            [("country", 1), ("source", 1), ("chunk_index", 1)],
+            unique=True,
+            partialFilterExpression={"source": {"$exists": True}}
+        )
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def extract_text(self, path: str, content: bytes) -> str:
+        """Extract and clean the full text of a source document"""
+        extension = self.document_processor._get_file_extension(path)
+        processor = self.document_processor.supported_formats.get(extension)
+        if processor is None:
+            raise ValueError(f"Unsupported file format: {extension}")
+        return self.document_processor._clean_text(processor(content))
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in batches"""
+        client = get_client()
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            batch = texts[start:start + EMBEDDING_BATCH_SIZE]
+            response = client.embeddings.create(model=EMBEDDING_MODEL, input=[normalize_text(text) for text in batch])
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return embeddings
+
+    def ingest_document(self, country: str, path: str, source: str):
+        """Ingest one document, embedding only chunks whose content changed"""
+        with open(path, "rb") as f:
+            content = f.read()
+        file_hash = hashlib.sha256(content).hexdigest()
+        if self.checkpoint.is_done(country, source, file_hash):
+            self._count(skipped_documents=1)
+            return
+
+        chunks = chunk_words(self.extract_text(path, content), self.chunk_size, self.chunk_overlap)
+        hashes = [content_hash(chunk) for chunk in chunks]
+
+        existing = {
+            doc["chunk_index"]: doc.get("content_hash")
+            for doc in self.collection.find({"country": country, "source": source}, {"chunk_index": 1, "content_hash": 1})
+        }
+        changed = [i for i, chunk_hash in enumerate(hashes) if existing.get(i) != chunk_hash]
+
+        operations = []
+        if changed:
+            embeddings = self.embed_texts([chunks[i] for i in changed])
+            now = datetime.utcnow().isoformat()
+            for i, embedding in zip(changed, embeddings):
+                operations.append(UpdateOne(
+                    {"country": country, "source": source, "chunk_index": i},
+                    {"$set": {"text": chunks[i], "embedding": embedding, "content_hash": hashes[i], "updated_at": now}},
+                    upsert=True
+                ))
+
+        # Remove chunks left over from a longer previous version of the document
+        stale = sum(1 for i in existing if i >= len(chunks))
+        if stale:
+            operations.append(DeleteMany({"country": country, "source": source, "chunk_index": {"$gte": len(chunks)}}))
+
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+        self.checkpoint.mark_done(country, source, file_hash)
+        self._count(documents=1, chunks_embedded=len(changed),
+                    chunks_unchanged=len(chunks) - len(changed), chunks_deleted=stale)
+        logger.info(f"Ingested {source}: {len(changed)} chunk(s) embedded, {len(chunks) - len(changed)} unchanged")
+
+    def ingest(self, country: str, paths: List[str]) -> Dict[str, int]:
+        """Ingest files and directories (recursively) with bounded concurrency"""
+        sources = list(self._iter_sources(paths))
+        logger.info(f"Ingesting {len(sources)} document(s) for {country} with concurrency {self.concurrency}")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {
+                executor.submit(self.ingest_document, country, path, source): source
+                for path, source in sources
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self._count(failed_documents=1)
+                    logger.error(f"Failed to ingest {futures[future]}: {e}")
+
+        return dict(self.stats)
+
+    def _iter_sources(self, paths: List[str]):
+        """Yield (path, source id) for every supported file below the given paths"""
+        supported = set(self.document_processor.supported_formats)
+        for root in paths:
+            if os.path.isfile(root):
+                yield root, os.path.basename(root)
+                continue
+            for directory, _, filenames in os.walk(root):
+                for filename in sorted(filenames):
+                    if self.document_processor._get_file_extension(filename) in supported:
+                        path = os.path.join(directory, filename)
+                        yield path, os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def main(argv: Optional[List[str]] = None):
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Ingest source documents into the country knowledge base")
+    parser.add_argument("paths", nargs="+", help="Files or directories (PDF, DOCX, TXT)")
+    parser.add_argument("--country", required=True, help="Country the documents belong to")
+    parser.add_argument("--checkpoint", default=".cache/ingestion_checkpoint.json", help="Checkpoint file for resuming")
+    parser.add_argument("--chunk-words", type=int, default=300, help="Words per chunk")
+    parser.add_argument("--chunk-overlap", type=int, default=50, help="Words shared by consecutive chunks")
+    parser.add_argument("--concurrency", type=int, default=4, help="Documents processed in parallel")
+    parser.add_argument("--snapshot", metavar="DIR", help="Rebuild the local vector snapshot afterwards")
+    args = parser.parse_args(argv)
+
+    mongo = get_sync_mongo_client()
+    collection = mongo["country_db"]["country_embeddings"]
+    ingestor = KnowledgeBaseIngestor(
+        collection,
+        IngestionCheckpoint(args.checkpoint),
+        chunk_size=args.chunk_words,
+        chunk_overlap=args.chunk_overlap,
+        concurrency=args.concurrency,
+    )
+
+    started = time.perf_counter()
+    stats = ingestor.ingest(args.country, args.paths)
+    print(f"Ingestion finished in {time.perf_counter() - started:.1f}s: {stats}")
+
+    if args.snapshot:
+        from services.vector_index import LocalVectorIndex
+        LocalVectorIndex.build_snapshot(collection, args.snapshot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import re
+from typing import List
+
+# Countries (with common alternative names) and first-level subdivisions that
+# legal questions are usually scoped to. Matched case-insensitively.
+COUNTRIES = (
+    "afghanistan, albania, algeria, andorra, angola, antigua and barbuda, argentina, armenia, australia, "
+    "austria, azerbaijan, bahamas, bahrain, bangladesh, barbados, belarus, belgium, belize, benin, bhutan, "
+    "bolivia, bosnia and herzegovina, bosnia, botswana, brazil, brunei, bulgaria, burkina faso, burundi, "
+    "cabo verde, cape verde, cambodia, cameroon, canada, central african republic, chad, chile, china, "
+    "colombia, comoros, congo, costa rica, cote d'ivoire, ivory coast, croatia, cuba, cyprus, czechia, "
+    "czech republic, denmark, djibouti, dominica, dominican republic, ecuador, egypt, el salvador, "
+    "equatorial guinea, eritrea, estonia, eswatini, swaziland, ethiopia, fiji, finland, france, gabon, "
+    "gambia, georgia, germany, ghana, greece, grenada, guatemala, guinea, guinea-bissau, guyana, haiti, "
+    "honduras, hong kong, hungary, iceland, india, indonesia, iran, iraq, ireland, israel, italy, jamaica, "
+    "japan, jordan, kazakhstan, kenya, kiribati, kosovo, kuwait, kyrgyzstan, laos, latvia, lebanon, "
+    "lesotho, liberia, libya, liechtenstein, lithuania, luxembourg, madagascar, malawi, malaysia, maldives, "
+    "mali, malta, marshall islands, mauritania, mauritius, mexico, micronesia, moldova, monaco, mongolia, "
+    "montenegro, morocco, mozambique, myanmar, burma, namibia, nauru, nepal, netherlands, holland, "
+    "new zealand, nicaragua, niger, nigeria, north korea, north macedonia, macedonia, norway, oman, "
+    "pakistan, palau, palestine, panama, papua new guinea, paraguay, peru, philippines, poland, portugal, "
+    "qatar, romania, russia, rwanda, saint kitts and nevis, saint lucia, saint vincent and the grenadines, "
+    "samoa, san marino, sao tome and principe, saudi arabia, senegal, serbia, seychelles, sierra leone, "
+    "singapore, slovakia, slovenia, solomon islands, somalia, south africa, south korea, korea, south sudan, "
+    "spain, sri lanka, sudan, suriname, sweden, switzerland, syria, taiwan, tajikistan, tanzania, thailand, "
+    "timor-leste, east timor, togo, tonga, trinidad and tobago, tunisia, turkey, turkiye, turkmenistan, "
+    "tuvalu, uganda, ukraine, united arab emirates, united kingdom, great britain, britain, england, wales, "
+    "scotland, northern ireland, united states, united states of america, america, uruguay, uzbekistan, "
+    "vanuatu, vatican, venezuela, vietnam, yemen, zambia, zimbabwe, european union"
+).split(", ")
+
+SUBDIVISIONS = (
+    "alabama, alaska, arizona, arkansas, california, colorado, connecticut, delaware, florida, hawaii, "
+    "idaho, illinois, indiana, iowa, kansas, kentucky, louisiana, maine, maryland, massachusetts, michigan, "
+    "minnesota, mississippi, missouri, montana, nebraska, nevada, new hampshire, new jersey, new mexico, "
+    "new york, north carolina, north dakota, ohio, oklahoma, oregon, pennsylvania, rhode island, "
+    "south carolina, south dakota, tennessee, texas, utah, vermont, virginia, washington, west virginia, "
+    "wisconsin, wyoming, district of columbia, puerto rico, alberta, british columbia, manitoba, "
+    "new brunswick, newfoundland, nova scotia, ontario, prince edward island, quebec, saskatchewan, yukon, "
+    "nunavut, northwest territories, new south wales, queensland, south australia, tasmania, victoria, "
+    "western australia, australian capital territory, northern territory, punjab, sindh, balochistan, "
+    "khyber pakhtunkhwa, maharashtra, karnataka, tamil nadu, kerala, gujarat, delhi, bavaria, catalonia"
+).split(", ")
+
+# Abbreviations are matched case-sensitively so the pronoun "us" doesn't count
+ABBREVIATIONS = ("U.S.A.", "U.S.", "U.K.", "USA", "US", "UK", "EU", "UAE", "DRC")
+
+# Longest alternatives first so "west virginia" wins over "virginia"
+_NAME_RE = re.compile(
+    r"(?<![\w'-])(" + "|".join(re.escape(name) for name in sorted(set(COUNTRIES + SUBDIVISIONS), key=len, reverse=True)) + r")(?![\w'-])",
+    re.IGNORECASE,
+)
+_ABBREVIATION_RE = re.compile(
+    r"(?<![\w.])(" + "|".join(re.escape(name) for name in ABBREVIATIONS) + r")(?![\w])"
+)
+
+
+def find_jurisdictions(text: str) -> List[str]:
+    """Known jurisdiction names in `text`, normalized (lowercase, abbreviations without dots)"""
+    text = text or ""
+    found = {" ".join(match.lower().split()) for match in _NAME_RE.findall(text)}
+    found.update(match.replace(".", "").lower() for match in _ABBREVIATION_RE.findall(text))
+    return sorted(found)
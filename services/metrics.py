@@ -0,0 +1,61 @@
+import bisect
+import threading
+from typing import Dict, Optional, Sequence
+
+# Upper bounds (seconds) suited to sub-second work such as password hashing
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (Prometheus-style cumulative buckets).
+
+    Thread-safe so it can be fed from executor threads. Quantiles are
+    estimated as the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self, buckets: Optional[Sequence[float]] = None):
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot: above the largest bound
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+
+    def quantile(self, fraction: float) -> float:
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = fraction * self.count
+            seen = 0
+            for bound, count in zip(self.buckets, self._counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+            return self.max
+
+    def snapshot(self) -> Dict[str, object]:
+        """Cumulative bucket counts plus count/sum and estimated quantiles"""
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets, self._counts):
+                running += count
+                cumulative[f"le_{bound:g}"] = running
+            cumulative["le_inf"] = self.count
+            count, total, largest = self.count, self.sum, self.max
+        return {
+            "buckets": cumulative,
+            "count": count,
+            "sum": round(total, 4),
+            "max": round(largest, 4),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
@@ -0,0 +1,131 @@
+import os
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Tesseract is most accurate around 300 DPI; more pixels only cost time
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "300"))
+# Longest side for images without DPI metadata (phone photos): ~A4 at 300 DPI
+OCR_MAX_DIMENSION = int(os.getenv("OCR_MAX_DIMENSION", "3500"))
+OCR_DESKEW_MAX_ANGLE = float(os.getenv("OCR_DESKEW_MAX_ANGLE", "5"))
+OCR_DESKEW_STEP = float(os.getenv("OCR_DESKEW_STEP", "0.5"))
+# Tesseract page segmentation mode (3 = fully automatic, 4 = single column, 6 = single block)
+OCR_PSM = int(os.getenv("OCR_PSM", "3"))
+OCR_OEM = os.getenv("OCR_OEM", "")
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "true").lower() == "true"
+
+
+def tesseract_config(psm: Optional[int] = None) -> str:
+    """Tesseract CLI flags for the configured page segmentation / engine mode"""
+    config = f"--psm {psm if psm is not None else OCR_PSM}"
+    if OCR_OEM:
+        config += f" --oem {OCR_OEM}"
+    return config
+
+
+def downscale(image: Image.Image, target_dpi: int = OCR_TARGET_DPI, max_dimension: int = OCR_MAX_DIMENSION) -> Image.Image:
+    """
+    Shrink the image to roughly `target_dpi`.
+
+    Uses the DPI recorded in the file when present, otherwise caps the
+    longest side at `max_dimension`. Images are never upscaled.
+    """
+    scale = 1.0
+    dpi = image.info.get("dpi")
+    if dpi and dpi[0] and float(dpi[0]) > target_dpi:
+        scale = target_dpi / float(dpi[0])
+    longest = max(image.size)
+    if longest * scale > max_dimension:
+        scale = max_dimension / longest
+    if scale >= 1.0:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.LANCZOS)
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Global threshold maximizing between-class variance of the histogram"""
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    if not total:
+        return 128
+    levels = np.arange(256)
+    weight_bg = np.cumsum(histogram)
+    weight_fg = total - weight_bg
+    cumulative_mean = np.cumsum(histogram * levels)
+    mean_bg = cumulative_mean / np.maximum(weight_bg, 1)
+    mean_fg = (cumulative_mean[-1] - cumulative_mean) / np.maximum(weight_fg, 1)
+    variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(variance))
+
+
+def binarize(gray: Image.Image) -> Image.Image:
+    """Black text on white using Otsu's threshold"""
+    threshold = otsu_threshold(np.asarray(gray))
+    return gray.point(lambda value: 255 if value > threshold else 0, mode="L")
+
+
+def estimate_skew(binary: Image.Image, max_angle: float = OCR_DESKEW_MAX_ANGLE, step: float = OCR_DESKEW_STEP) -> float:
+    """
+    Skew angle in degrees by projection profile.
+
+    Horizontal text lines make the row sums jump sharply between lines and
+    gaps, so the rotation that maximizes the squared row-to-row differences
+    wins. Dark borders change slowly and barely affect the score. Runs on
+    the central part of a thumbnail to keep it cheap.
+    """
+    thumbnail = binary.copy()
+    thumbnail.thumbnail((800, 800))
+    ink = ImageOps.invert(thumbnail)  # text = 255 so rotation fill (0) adds no ink
+    margin_x, margin_y = ink.width // 10, ink.height // 10
+
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        rotated = np.asarray(ink.rotate(float(angle), resample=Image.NEAREST, fillcolor=0), dtype=np.float32)
+        profile = rotated[margin_y:ink.height - margin_y, margin_x:ink.width - margin_x].sum(axis=1)
+        score = float(np.sum(np.diff(profile) ** 2))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def deskew(binary: Image.Image, angle: Optional[float] = None) -> Tuple[Image.Image, float]:
+    """Rotate a binarized page so text lines are horizontal"""
+    if angle is None:
+        angle = estimate_skew(binary)
+    if abs(angle) < OCR_DESKEW_STEP / 2:
+        return binary, 0.0
+    return binary.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255), angle
+
+
+def image_entropy(image: Image.Image) -> float:
+    """
+    Shannon entropy (bits) of the grayscale histogram of a thumbnail.
+
+    Scans of text on a plain page sit around 1-5 bits; photos, screenshots
+    with imagery and busy backgrounds approach 8.
+    """
+    thumbnail = ImageOps.grayscale(image)
+    thumbnail.thumbnail((256, 256), resample=Image.NEAREST)  # sample pixels, don't average away texture
+    histogram = np.bincount(np.asarray(thumbnail).ravel(), minlength=256).astype(np.float64)
+    probabilities = histogram[histogram > 0] / histogram.sum()
+    return float(-(probabilities * np.log2(probabilities)).sum())
+
+
+def preprocess_for_ocr(image: Image.Image) -> Image.Image:
+    """
+    Prepare an image for Tesseract: apply EXIF orientation, downscale to the
+    target DPI, convert to grayscale, binarize and deskew
+    """
+    image = ImageOps.exif_transpose(image)
+    image = downscale(image)
+    gray = ImageOps.grayscale(image)
+    binary = binarize(gray)
+    binary, angle = deskew(binary)
+    if angle:
+        logger.debug(f"Deskewed OCR input by {angle:.1f} degrees")
+    return binary
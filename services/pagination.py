@@ -0,0 +1,54 @@
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from bson import json_util
+from fastapi import HTTPException
+
+ASCENDING = 1
+DESCENDING = -1
+
+# (field, direction) pairs; the last field must be unique (normally _id) so the order is total
+SortKey = Sequence[Tuple[str, int]]
+
+
+def encode_cursor(document: Dict[str, Any], sort: SortKey) -> str:
+    """Opaque cursor pointing just past `document` in `sort` order"""
+    values = [document.get(field) for field, _ in sort]
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: SortKey) -> List[Any]:
+    """Sort-key values of a cursor made by `encode_cursor`; 400 when it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_filter(cursor: str, sort: SortKey) -> Dict[str, Any]:
+    """
+    Filter matching documents that come after the cursor in `sort` order.
+
+    For sort [(a, -1), (_id, -1)] this is
+    {a < A} or {a == A and _id < ID}, which an index on the same keys
+    answers with a range scan, so every page costs the same however deep it is.
+    """
+    values = decode_cursor(cursor, sort)
+    clauses = []
+    for position, (field, direction) in enumerate(sort):
+        clause = {sort[i][0]: values[i] for i in range(position)}
+        clause[field] = {"$gt" if direction == ASCENDING else "$lt": values[position]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def page(documents: List[Dict[str, Any]], limit: int, sort: SortKey) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Split a `limit + 1` fetch into the page and the cursor of the next one (None on the last page)"""
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    return documents, encode_cursor(documents[-1], sort)
@@ -0,0 +1,101 @@
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from services.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so threads run hashes in parallel
+    and keep them off the event loop. Requests beyond `max_pending` in
+    flight are rejected with 503 instead of queueing behind a login burst.
+    Hashes made with a different cost than BCRYPT_ROUNDS are reported by
+    `verify_and_update` so the caller can store the rehash.
+    """
+
+    def __init__(self, rounds: Optional[int] = None, max_workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.rounds = rounds or int(os.getenv("BCRYPT_ROUNDS", "12"))
+        self.max_workers = max_workers or int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 2))))
+        self.max_pending = max_pending or int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(self.max_workers * 16)))
+
+        # Any cost other than the configured one counts as deprecated and is rehashed on login
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__rounds=self.rounds,
+            bcrypt__min_rounds=self.rounds,
+            bcrypt__max_rounds=self.rounds,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        self._inflight = 0
+
+        self.rejected = 0
+        self.rehashed = 0
+        self.queue_wait = Histogram()
+        self.hash_time = Histogram()
+
+    async def _run(self, func: Callable, *args: Any) -> Any:
+        if self._inflight >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Too many sign-in attempts in progress, please retry shortly")
+
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            self.queue_wait.observe(started - submitted)
+            try:
+                return func(*args)
+            finally:
+                self.hash_time.observe(time.perf_counter() - started)
+
+        self._inflight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self._inflight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Check a password; also returns a new hash when the stored one uses another cost"""
+        verified, new_hash = await self._run(self.context.verify_and_update, password, hashed)
+        if new_hash:
+            self.rehashed += 1
+        return verified, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "workers": self.max_workers,
+            "in_flight": self._inflight,
+            "queue_depth": max(0, self._inflight - self.max_workers),
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "hash_seconds": self.hash_time.snapshot(),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Get the shared password hasher"""
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher()
+    return _password_hasher
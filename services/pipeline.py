@@ -0,0 +1,65 @@
+import time
+import asyncio
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Iterator, List
+
+
+class StageTimer:
+    """
+    Wall-clock durations of the named stages of one request.
+
+    Stages that run concurrently are timed independently, so their sum can
+    exceed the total. Rendered as a Server-Timing header and a log line.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - started
+
+    async def timed(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        """Await `awaitable`, recording its duration under `name`"""
+        with self.stage(name):
+            return await awaitable
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (milliseconds)"""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items()]
+        entries.append(f"total;dur={self.total() * 1000:.1f}")
+        return ", ".join(entries)
+
+    def summary(self) -> str:
+        parts = [f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.durations.items()]
+        parts.append(f"total={self.total() * 1000:.0f}ms")
+        return " ".join(parts)
+
+
+async def run_concurrently(*awaitables: Awaitable[Any]) -> List[Any]:
+    """
+    Run awaitables concurrently and return their results in order.
+
+    Unlike asyncio.gather, the first failure cancels the others instead of
+    leaving them running (e.g. no point OCR-ing an image for a chat that
+    turned out not to exist).
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in tasks:
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+        return [task.result() for task in tasks]
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
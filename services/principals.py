@@ -0,0 +1,55 @@
+import os
+from typing import Any, Dict, Optional
+from bson import ObjectId
+from services.ttl_cache import TTLCache
+
+# Fields of the user document kept in a principal (never the password hash)
+PRINCIPAL_FIELDS = ("name", "email", "created_at")
+PRINCIPAL_PROJECTION = {field: 1 for field in PRINCIPAL_FIELDS}
+
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated users keyed by token subject.
+
+    Saves the users lookup on every authenticated request. Entries expire
+    after AUTH_PRINCIPAL_CACHE_TTL_SECONDS, so a deleted or changed user is
+    noticed within that window at the latest; code that changes a user
+    document should call `invalidate` to make it immediate.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self._principals = TTLCache(
+            max_entries=max_entries or int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "10000")),
+            ttl_seconds=ttl_seconds if ttl_seconds is not None else float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+        )
+
+    def get(self, user_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """Cached principal (a copy callers may modify) or None"""
+        principal = self._principals.get(str(user_id))
+        return dict(principal) if principal is not None else None
+
+    def put(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache a user document and return its principal"""
+        principal = {"_id": user["_id"], "id": str(user["_id"])}
+        principal.update({field: user[field] for field in PRINCIPAL_FIELDS if field in user})
+        if self._principals.ttl_seconds > 0:
+            self._principals.set(principal["id"], principal)
+        return dict(principal)
+
+    def invalidate(self, user_id: Any):
+        """Drop a user's cached principal (after updating or deleting the user)"""
+        self._principals.delete(str(user_id))
+
+    def clear(self):
+        self._principals.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._principals.stats()
+
+
+def principal_from_claims(user_id: ObjectId, claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Principal built from signed token claims alone, without a database lookup"""
+    principal = {"_id": user_id, "id": str(user_id)}
+    principal.update({field: claims[field] for field in ("name", "email") if field in claims})
+    return principal
@@ -0,0 +1,140 @@
+import re
+import time
+import asyncio
+import hashlib
+import logging
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from services.jurisdictions import find_jurisdictions
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[^\W\d_][\w'-]*|[.!?]", re.UNICODE)
+
+
+def jurisdiction_terms(text: str) -> List[str]:
+    """
+    Known country/state names (any case) plus capitalized words that don't
+    start a sentence (e.g. statute names). Near-identical questions about
+    different jurisdictions embed very closely, so these terms must match
+    exactly for a cache hit.
+    """
+    terms = set(find_jurisdictions(text))
+    sentence_start = True
+    for token in _WORD_RE.findall(text):
+        if token in ".!?":
+            sentence_start = True
+            continue
+        if not sentence_start and token[0].isupper():
+            terms.add(token.lower())
+        sentence_start = False
+    return sorted(terms)
+
+
+class SemanticAnswerCache:
+    """
+    Returns a previous answer when a new prompt is semantically near-identical.
+
+    Entries are grouped by a signature built from the prompt's jurisdiction
+    terms, the optional user-supplied context and the last exchange of the
+    chat, so a hit requires the same country/context and only the wording
+    of the question may differ. Within a signature the best cosine match
+    above `threshold` wins. Entries expire after `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], List[float]],
+        threshold: float = 0.95,
+        ttl_seconds: float = 86400,
+        max_entries: int = 5000,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._buckets: Dict[str, List[dict]] = {}
+        self._order: deque = deque()  # (signature, entry) in insertion order, for eviction
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def signature(prompt: str, context: Optional[str] = None, history: Iterable[Dict[str, str]] = ()) -> Optional[str]:
+        """
+        Country/context signature of a prompt, or None when no known
+        jurisdiction appears in the prompt, context or last exchange: the
+        answer's jurisdiction can't be pinned down, so it isn't cached
+        """
+        last_exchange = list(history)[-2:]
+        scope_text = " ".join([prompt, context or ""] + [str(msg.get("content", "")) for msg in last_exchange])
+        if not find_jurisdictions(scope_text):
+            return None
+        parts = [
+            ",".join(jurisdiction_terms(prompt)),
+            " ".join((context or "").lower().split()),
+            "\n".join(f"{msg.get('role')}:{msg.get('content')}" for msg in last_exchange),
+        ]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    async def _embed(self, prompt: str) -> np.ndarray:
+        vector = np.asarray(await asyncio.to_thread(self.embed, prompt), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def lookup(self, prompt: str, signature: str) -> Optional[str]:
+        """Cached answer for a near-identical prompt with the same signature, or None"""
+        now = time.time()
+        bucket = [entry for entry in self._buckets.get(signature, []) if entry["expires_at"] > now]
+        if not bucket:
+            self._buckets.pop(signature, None)
+            self.misses += 1
+            return None
+        self._buckets[signature] = bucket
+
+        vector = await self._embed(prompt)
+        scores = np.stack([entry["vector"] for entry in bucket]) @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        logger.info(f"Semantic cache hit (similarity {scores[best]:.3f})")
+        return bucket[best]["answer"]
+
+    async def store(self, prompt: str, signature: str, answer: str):
+        """Remember the answer to a prompt"""
+        entry = {
+            "vector": await self._embed(prompt),
+            "answer": answer,
+            "expires_at": time.time() + self.ttl_seconds,
+        }
+        self._buckets.setdefault(signature, []).append(entry)
+        self._order.append((signature, entry))
+        self.stores += 1
+
+        while len(self._order) > self.max_entries:
+            old_signature, old_entry = self._order.popleft()
+            bucket = self._buckets.get(old_signature, [])
+            # Compare by identity: entries hold numpy vectors
+            for index, entry in enumerate(bucket):
+                if entry is old_entry:
+                    del bucket[index]
+                    break
+            if not bucket:
+                self._buckets.pop(old_signature, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters"""
+        return {
+            "entries": sum(len(bucket) for bucket in self._buckets.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+        }
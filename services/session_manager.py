@@ -0,0 +1,195 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 8 messages = 4 user/assistant pairs
+HISTORY_MAX_MESSAGES = 8
+
+# Rough per-message bookkeeping overhead (dict + strings) added to content length
+_MESSAGE_OVERHEAD_BYTES = 256
+
+
+class ChatSession:
+    """Conversation state (history and agent actions) for a single chat"""
+
+    def __init__(self, chat_id: str, history: Optional[List[Dict[str, str]]] = None):
+        self.chat_id = chat_id
+        self.conversation_history = deque(history or [], maxlen=HISTORY_MAX_MESSAGES)
+        self.agent_actions: List[Dict[str, str]] = []
+        # Serializes turns of the same chat so history stays consistent
+        self.lock = asyncio.Lock()
+        # Turns that hold this session (taken before the lock is), so it can't be evicted under them
+        self.leases = 0
+        self.last_access = time.monotonic()
+
+    def in_use(self) -> bool:
+        return self.leases > 0 or self.lock.locked()
+
+    def add_to_history(self, user_query: str, assistant_response: str):
+        """Add user query and assistant response to conversation history"""
+        self.conversation_history.append({"role": "user", "content": user_query})
+        self.conversation_history.append({"role": "assistant", "content": assistant_response})
+
+    def clear_history(self):
+        """Clear conversation history"""
+        self.conversation_history.clear()
+
+    def add_agent_action(self, action: str, description: str):
+        """Track agent actions with timestamp"""
+        import datetime
+        self.agent_actions.append({
+            "action": action,
+            "description": description,
+            "timestamp": datetime.datetime.now().isoformat()
+        })
+
+    def get_agent_actions(self) -> List[Dict[str, str]]:
+        """Get current agent actions"""
+        return self.agent_actions.copy()
+
+    def clear_agent_actions(self):
+        """Clear agent actions"""
+        self.agent_actions.clear()
+
+    def estimated_size(self) -> int:
+        """Approximate memory held by this session in bytes"""
+        size = _MESSAGE_OVERHEAD_BYTES
+        for msg in self.conversation_history:
+            size += len(msg.get("content") or "") + _MESSAGE_OVERHEAD_BYTES
+        for action in self.agent_actions:
+            size += len(action.get("description") or "") + _MESSAGE_OVERHEAD_BYTES
+        return size
+
+
+HistoryLoader = Callable[[str], Awaitable[List[Dict[str, str]]]]
+
+
+class SessionManager:
+    """
+    Keeps hot chat sessions in an LRU keyed by chat_id.
+
+    Sessions are evicted when the entry cap or the approximate memory cap is
+    exceeded (least recently used first) and when they have been idle longer
+    than the idle timeout. On a cache miss the history is rebuilt through the
+    supplied async loader, usually from persisted messages.
+    """
+
+    def __init__(
+        self,
+        history_loader: HistoryLoader,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        idle_seconds: Optional[float] = None,
+    ):
+        self.history_loader = history_loader
+        self.max_entries = max_entries or int(os.getenv("SESSION_MAX_ENTRIES", "1000"))
+        self.max_bytes = max_bytes or int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.idle_seconds = idle_seconds or float(os.getenv("SESSION_IDLE_SECONDS", "1800"))
+
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get_session(self, chat_id: str, load_history: bool = True, pin: bool = False) -> ChatSession:
+        """
+        Get the session for a chat, rebuilding its history on a cache miss
+
+        Args:
+            chat_id: Chat identifier
+            load_history: Set to False for brand-new chats that have no stored messages
+            pin: Keep the session from being evicted until `release` is called,
+                so a turn can hold it between loading and taking its lock
+
+        Returns:
+            The hot session for this chat
+        """
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        session = self.peek(chat_id)
+        if session is not None:
+            self.hits += 1
+            if pin:
+                session.leases += 1
+            return session
+
+        self.misses += 1
+        history = await self.history_loader(chat_id) if load_history else []
+
+        # Another request may have loaded the same chat while we were waiting
+        session = self.peek(chat_id)
+        if session is None:
+            session = ChatSession(chat_id, history)
+            self._sessions[chat_id] = session
+            self.update(session)
+        if pin:
+            session.leases += 1
+        return session
+
+    def release(self, session: ChatSession):
+        """Unpin a session taken with get_session(pin=True)"""
+        session.leases = max(0, session.leases - 1)
+        session.last_access = time.monotonic()
+
+    def peek(self, chat_id: str) -> Optional[ChatSession]:
+        """Get a hot session without loading it, refreshing its LRU position"""
+        session = self._sessions.get(chat_id)
+        if session is not None:
+            self._sessions.move_to_end(chat_id)
+            session.last_access = time.monotonic()
+        return session
+
+    def update(self, session: ChatSession):
+        """Re-measure a session after it changed and enforce the caps"""
+        if session.chat_id not in self._sessions:
+            return
+        new_size = session.estimated_size()
+        self._total_bytes += new_size - self._sizes.get(session.chat_id, 0)
+        self._sizes[session.chat_id] = new_size
+        self._evict_over_capacity(keep=session.chat_id)
+
+    def drop(self, chat_id: str):
+        """Remove a session from the cache"""
+        if self._sessions.pop(chat_id, None) is not None:
+            self._total_bytes -= self._sizes.pop(chat_id, 0)
+
+    def _evict_idle(self, now: float):
+        # Oldest entries are at the front, so stop at the first non-idle one
+        while self._sessions:
+            chat_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access < self.idle_seconds or session.in_use():
+                break
+            self.drop(chat_id)
+            self.evictions += 1
+
+    def _evict_over_capacity(self, keep: str):
+        # Least recently used first; sessions held by a turn stay, or a concurrent
+        # turn would load a second session for the chat and lose per-chat serialization
+        while len(self._sessions) > self.max_entries or self._total_bytes > self.max_bytes:
+            victim = next(
+                (chat_id for chat_id, session in self._sessions.items() if chat_id != keep and not session.in_use()),
+                None
+            )
+            if victim is None:
+                break
+            self.drop(victim)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Cache statistics"""
+        return {
+            "sessions": len(self._sessions),
+            "approx_bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
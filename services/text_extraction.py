@@ -0,0 +1,109 @@
+import io
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Union
+import PyPDF2
+from docx import Document
+
+# Module-level extractors so they can be pickled and run in worker processes
+
+# Content handed to extractors: bytes for small uploads, a file path once spooled to disk
+UploadSource = Union[bytes, str]
+
+
+@contextmanager
+def open_source(source: UploadSource) -> Iterator[BinaryIO]:
+    """Open upload content as a seekable binary stream"""
+    if isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+        return
+    # A regular file handle, not an mmap: zipfile (DOCX) needs seekable(), which mmap lacks
+    with open(source, "rb") as handle:
+        yield handle
+
+
+def read_source(source: UploadSource) -> bytes:
+    """Full upload content as bytes"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    with open(source, "rb") as handle:
+        return handle.read()
+
+
+class ExtractionResult(NamedTuple):
+    """Extracted text and whether the word budget cut it short"""
+    text: str
+    truncated: bool
+
+
+def take_words(pages: Iterable[str], max_words: int) -> ExtractionResult:
+    """
+    Consume page texts until `max_words` words are collected.
+
+    `pages` is read lazily, so pages after the budget is reached are never
+    extracted. The page that crosses the budget is cut at the last word that
+    fits and the result is flagged as truncated.
+    """
+    collected = []
+    word_count = 0
+    for page_text in pages:
+        if not page_text or not page_text.strip():
+            continue
+        words = page_text.split()
+        if word_count + len(words) > max_words:
+            remaining = max_words - word_count
+            if remaining:
+                collected.append(" ".join(words[:remaining]))
+            return ExtractionResult("\n".join(collected), True)
+        collected.append(page_text)
+        word_count += len(words)
+    return ExtractionResult("\n".join(collected).strip(), False)
+
+
+def iter_pdf_pages(content: UploadSource) -> Iterator[str]:
+    """Yield the text of each PDF page, extracting pages on demand"""
+    with open_source(content) as stream:
+        pdf_reader = PyPDF2.PdfReader(stream)
+        for page in pdf_reader.pages:
+            yield page.extract_text() or ""
+
+
+def iter_docx_paragraphs(content: UploadSource) -> Iterator[str]:
+    """Yield the non-empty paragraphs of a DOCX document"""
+    with open_source(content) as stream:
+        doc = Document(stream)
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            yield paragraph.text
+
+
+def extract_pdf_text(content: UploadSource) -> str:
+    """Extract text from PDF content"""
+    return "\n".join(page for page in iter_pdf_pages(content) if page).strip()
+
+
+def extract_docx_text(content: UploadSource) -> str:
+    """Extract text from DOCX content"""
+    return "\n".join(iter_docx_paragraphs(content)).strip()
+
+
+def extract_pdf_excerpt(content: UploadSource, max_words: int) -> ExtractionResult:
+    """Extract PDF text up to `max_words`, stopping at the first page past the budget"""
+    return take_words(iter_pdf_pages(content), max_words)
+
+
+def extract_docx_excerpt(content: UploadSource, max_words: int) -> ExtractionResult:
+    """Extract DOCX text up to `max_words`"""
+    return take_words(iter_docx_paragraphs(content), max_words)
+
+
+def extract_txt_text(content: UploadSource) -> str:
+    """Extract text from TXT content"""
+    content = read_source(content)
+    # Try different encodings
+    for encoding in ['utf-8', 'latin-1', 'cp1252']:
+        try:
+            return content.decode(encoding).strip()
+        except UnicodeDecodeError:
+            continue
+
+    raise ValueError("Could not decode text file with any supported encoding")
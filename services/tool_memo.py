@@ -0,0 +1,115 @@
+import json
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from services.ttl_cache import TTLCache
+
+# Cache scopes a tool can declare in the agent's tool registry
+SCOPE_NONE = "none"          # always execute
+SCOPE_REQUEST = "request"    # reuse results within one chat_with_agent run
+SCOPE_PROCESS = "process"    # reuse results across requests until the TTL expires
+
+
+class ToolMemoizer:
+    """
+    Memoizes agent tool results by canonicalized arguments.
+
+    Arguments are canonicalized (keys sorted, empty values dropped, string
+    whitespace collapsed) so trivially different calls share an entry. Case
+    is kept because filters such as `country` are case-sensitive. Identical
+    calls that are still running are joined instead of executed twice.
+    Results that start with "Error" are never reused.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._results = TTLCache(max_entries=max_entries)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.executions: Counter = Counter()
+        self.avoided: Counter = Counter()
+
+    @staticmethod
+    def canonical_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Cache key for a tool call"""
+        canonical = {}
+        for name, value in arguments.items():
+            if value is None or value == "":
+                continue
+            canonical[name] = " ".join(value.split()) if isinstance(value, str) else value
+        return json.dumps([tool_name, canonical], sort_keys=True, default=str)
+
+    @staticmethod
+    def new_request_memo() -> Dict[str, asyncio.Future]:
+        """Memo for one agent run (used by tools with request scope)"""
+        return {}
+
+    async def run(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        execute: Callable[[], Awaitable[str]],
+        scope: str = SCOPE_NONE,
+        ttl_seconds: Optional[float] = None,
+        request_memo: Optional[Dict[str, asyncio.Future]] = None,
+    ) -> Tuple[str, bool]:
+        """
+        Run a tool through the memo
+
+        Returns:
+            (result, reused) where reused is True when no execution was needed
+        """
+        if scope == SCOPE_REQUEST and request_memo is None:
+            scope = SCOPE_NONE
+        if scope not in (SCOPE_REQUEST, SCOPE_PROCESS):
+            self.executions[tool_name] += 1
+            return await execute(), False
+
+        key = self.canonical_key(tool_name, arguments)
+        if scope == SCOPE_PROCESS:
+            cached = self._results.get(key)
+            if cached is not None:
+                self.avoided[tool_name] += 1
+                return cached, True
+            inflight = self._inflight
+        else:
+            inflight = request_memo
+
+        pending = inflight.get(key)
+        if pending is not None:
+            # Shielded: a joiner going away must not cancel the shared execution
+            result = await asyncio.shield(pending)
+            if self._failed(result):
+                return result, False
+            self.avoided[tool_name] += 1
+            return result, True
+
+        self.executions[tool_name] += 1
+        # Detached from the owner: the owner being cancelled (e.g. its client
+        # disconnected) must not cancel the execution that other requests joined
+        task = asyncio.ensure_future(execute())
+        inflight[key] = task
+        task.add_done_callback(lambda done: self._settle(done, key, inflight, scope, ttl_seconds))
+        return await asyncio.shield(task), False
+
+    @staticmethod
+    def _failed(result: Any) -> bool:
+        return not isinstance(result, str) or result.startswith("Error")
+
+    def _settle(self, task: asyncio.Future, key: str, inflight: Dict[str, asyncio.Future], scope: str, ttl_seconds: Optional[float]):
+        """Store or drop a finished execution, whoever is still waiting for it"""
+        if task.cancelled() or task.exception() is not None or self._failed(task.result()):
+            if inflight.get(key) is task:
+                del inflight[key]
+            return
+        if scope == SCOPE_PROCESS:
+            if inflight.get(key) is task:
+                del inflight[key]
+            self._results.set(key, task.result(), ttl_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Executions performed and avoided, per tool"""
+        return {
+            "executions": dict(self.executions),
+            "avoided": dict(self.avoided),
+            "avoided_total": sum(self.avoided.values()),
+            "process_cache": self._results.stats(),
+        }
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire after a TTL.
+
+    Thread-safe. When `persist_path` is set, entries (which must then be
+    JSON-serializable and keyed by strings) are reloaded from that file at
+    startup and written back by a background timer at most every
+    `persist_interval` seconds after a change (and at exit), so writers
+    never wait for the file.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        persist_path: Optional[str] = None,
+        persist_interval: float = 5.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self.persist_interval = persist_interval
+
+        # key -> (expires_at wall-clock timestamp, value)
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()  # serializes file writes, not cache access
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if persist_path:
+            self._load()
+            atexit.register(self.flush)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Get a live entry (refreshing its LRU position) or `default`"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Any, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting the least recently used entries past the size bound"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._save()
+
+    def delete(self, key: Any):
+        """Remove an entry if present"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _load(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            now = time.time()
+            for key, expires_at, value in stored:
+                if expires_at > now:
+                    self._entries[key] = (expires_at, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache file {self.persist_path}: {e}")
+
+    def _save(self):
+        """Schedule a write of the cache file (called with the lock held)"""
+        if not self.persist_path:
+            return
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.persist_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Write pending changes to the cache file now"""
+        if not self.persist_path:
+            return
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                snapshot = [[key, expires_at, value] for key, (expires_at, value) in self._entries.items()]
+            # Serialize and write outside the cache lock
+            try:
+                directory = os.path.dirname(self.persist_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = self.persist_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self.persist_path)
+            except (OSError, TypeError) as e:
+                logger.warning(f"Failed to persist cache to {self.persist_path}: {e}")
@@ -0,0 +1,141 @@
+import os
+import hashlib
+from typing import Optional
+from fastapi import UploadFile, HTTPException
+from starlette.responses import JSONResponse
+from services.text_extraction import UploadSource, open_source, read_source
+
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(64 * 1024)))
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(40 * 1024 * 1024)))
+
+
+def _format_mb(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f}MB"
+
+
+def _disk_path(fileobj) -> Optional[str]:
+    """
+    Path a worker process can open an upload's file by, or None while it is
+    still in memory.
+
+    Starlette spools uploads to an anonymous temp file past 1MB; its `name`
+    is then the descriptor, which /proc re-opens from another process.
+    """
+    name = getattr(fileobj, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+    if isinstance(name, int):
+        path = f"/proc/{os.getpid()}/fd/{name}"
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class ScannedUpload:
+    """
+    Size and SHA-256 of an upload, plus its content for extractors.
+
+    The content is the file Starlette already spooled the upload into: its
+    path once it is on disk, so worker processes open it instead of
+    receiving a pickled copy, otherwise the bytes. The file itself belongs
+    to the request and is left alone on close.
+    """
+
+    def __init__(self, size: int, sha256: str, path: Optional[str] = None, content: Optional[bytes] = None):
+        self.size = size
+        self.sha256 = sha256
+        self.path = path
+        self._content = content
+
+    @property
+    def source(self) -> UploadSource:
+        """Content for extractors: bytes in memory or the upload's file path"""
+        return self.path if self.path else self._content
+
+    def open(self):
+        """Seekable binary stream over the content"""
+        return open_source(self.source)
+
+    def read_bytes(self) -> bytes:
+        return read_source(self.source)
+
+    def close(self):
+        """Drop the in-memory content"""
+        self.path = None
+        self._content = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def scan_upload(file: UploadFile, max_bytes: int, label: str = "File") -> ScannedUpload:
+    """
+    Hash an upload in chunks straight from its file, rejecting it with 413 as
+    soon as it grows past `max_bytes`, then rewind it
+    """
+    size = 0
+    digest = hashlib.sha256()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"{label} too large. Maximum allowed: {_format_mb(max_bytes)}"
+            )
+        digest.update(chunk)
+    await file.seek(0)
+
+    path = _disk_path(file.file)
+    # In memory (at most Starlette's 1MB spool) or no /proc: hand over the bytes
+    content = None if path else await file.read()
+    return ScannedUpload(size, digest.hexdigest(), path=path, content=content)
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject request bodies larger than `max_bytes` with 413.
+
+    A declared Content-Length over the limit is rejected before the body is
+    read; bodies without one are counted as they arrive.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(
+                {"detail": f"Request too large. Maximum allowed: {_format_mb(self.max_bytes)}"},
+                status_code=413
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Request too large. Maximum allowed: {_format_mb(self.max_bytes)}"
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_FILE = "embeddings.npy"
+META_FILE = "meta.json"
+
+
+class LocalVectorIndex:
+    """
+    In-process vector index over a snapshot of the country_embeddings collection.
+
+    A snapshot is a directory holding `embeddings.npy` (float32, L2-normalized
+    rows grouped by country) and `meta.json` (row span per country and the
+    document id/text of every row). The matrix is memory-mapped, so only the
+    pages of the countries actually searched are read, and top-k is a single
+    vectorized dot product per query.
+    """
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        with open(os.path.join(snapshot_path, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.matrix = np.load(os.path.join(snapshot_path, EMBEDDINGS_FILE), mmap_mode="r")
+        self.countries: Dict[str, List[int]] = meta["countries"]
+        self.documents: List[Dict] = meta["documents"]
+        logger.info(f"Loaded local vector index: {len(self.documents)} vectors, {len(self.countries)} countries")
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def search(self, query_embedding: List[float], country: str, limit: int = 2) -> List[Dict]:
+        """Top-k search for one query in a given country"""
+        return self.search_many([query_embedding], country, limit)[0]
+
+    def search_many(self, query_embeddings: List[List[float]], country: str, limit: int = 2) -> List[List[Dict]]:
+        """Top-k search for several queries in a given country with one matrix product"""
+        span = self.countries.get(country)
+        if not span or not query_embeddings or limit <= 0:
+            return [[] for _ in query_embeddings]
+
+        start, end = span
+        rows = self.matrix[start:end]
+        queries = self._normalize(np.asarray(query_embeddings, dtype=np.float32))
+        # Map cosine similarity to [0, 1] like Atlas' vectorSearchScore for cosine indexes
+        scores = (1.0 + queries @ rows.T) / 2.0
+
+        k = min(limit, end - start)
+        results = []
+        for query_scores in scores:
+            top = np.argpartition(-query_scores, k - 1)[:k]
+            top = top[np.argsort(-query_scores[top])]
+            results.append([
+                {
+                    "_id": self.documents[start + i]["_id"],
+                    "country": self.documents[start + i]["country"],
+                    "text": self.documents[start + i]["text"],
+                    "score": float(query_scores[i]),
+                } for i in top
+            ])
+        return results
+
+    @staticmethod
+    def build_snapshot(collection, snapshot_path: str) -> int:
+        """
+        Export a country_embeddings collection into a snapshot directory
+
+        Args:
+            collection: pymongo collection with `country`, `text` and `embedding` fields
+            snapshot_path: Target directory (files are replaced atomically)
+
+        Returns:
+            Number of vectors written
+        """
+        query = {"embedding": {"$exists": True}}
+        first = collection.find_one(query, {"embedding": 1})
+        if first is None:
+            raise ValueError("Collection has no embedded documents to snapshot")
+
+        os.makedirs(snapshot_path, exist_ok=True)
+        capacity = collection.count_documents(query)
+        dim = len(first["embedding"])
+        embeddings_tmp = os.path.join(snapshot_path, EMBEDDINGS_FILE + ".tmp")
+        matrix = np.lib.format.open_memmap(embeddings_tmp, mode="w+", dtype=np.float32, shape=(capacity, dim))
+
+        countries: Dict[str, List[int]] = {}
+        documents: List[Dict] = []
+        # Grouping by country needs a sort over the whole collection; let the server spill it to disk
+        cursor = collection.find(query, {"country": 1, "text": 1, "embedding": 1}, allow_disk_use=True).sort("country", 1)
+        for row, doc in enumerate(cursor):
+            if row >= capacity:
+                logger.warning("Collection grew while exporting; remaining documents skipped")
+                break
+            country = doc.get("country", "")
+            matrix[row] = doc["embedding"]
+            span = countries.setdefault(country, [row, row])
+            span[1] = row + 1
+            documents.append({"_id": str(doc["_id"]), "country": country, "text": doc.get("text", "")})
+
+        count = len(documents)
+        for chunk_start in range(0, count, 10000):
+            chunk = slice(chunk_start, min(chunk_start + 10000, count))
+            matrix[chunk] = LocalVectorIndex._normalize(np.asarray(matrix[chunk]))
+        matrix.flush()
+        del matrix
+
+        meta_tmp = os.path.join(snapshot_path, META_FILE + ".tmp")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump({"dim": dim, "count": count, "countries": countries, "documents": documents}, f)
+
+        os.replace(embeddings_tmp, os.path.join(snapshot_path, EMBEDDINGS_FILE))
+        os.replace(meta_tmp, os.path.join(snapshot_path, META_FILE))
+        logger.info(f"Wrote vector snapshot with {count} vectors to {snapshot_path}")
+        return count
+
+    @staticmethod
+    def snapshot_exists(snapshot_path: Optional[str]) -> bool:
+        """Whether a complete snapshot is present at the given path"""
+        return bool(snapshot_path) and all(
+            os.path.exists(os.path.join(snapshot_path, name)) for name in (EMBEDDINGS_FILE, META_FILE)
+        )
+
+
+# Export a snapshot: python -m services.vector_index [snapshot_dir]
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from services.database import get_sync_mongo_client
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    target = sys.argv[1] if len(sys.argv) > 1 else os.getenv("VECTOR_SNAPSHOT_PATH", ".cache/vector_snapshot")
+    mongo = get_sync_mongo_client()
+    total = LocalVectorIndex.build_snapshot(mongo["country_db"]["country_embeddings"], target)
+    print(f"Snapshot written: {total} vectors -> {target}")
@@ -0,0 +1,109 @@
+import os
+import io
+import base64
+import logging
+from typing import BinaryIO, List, NamedTuple
+
+from PIL import Image, ImageOps
+
+# High-detail vision models fit images into 2048x2048 and then scale the short side to 768px,
+# so anything larger is downscaled server-side after we paid to upload it
+VISION_SHORT_SIDE = int(os.getenv("VISION_SHORT_SIDE", "768"))
+VISION_LONG_SIDE = int(os.getenv("VISION_LONG_SIDE", "2048"))
+# Tall scans are cut into overlapping tiles instead of being squeezed below a readable size
+VISION_TILE_LENGTH = int(os.getenv("VISION_TILE_LENGTH", "1536"))
+VISION_TILE_OVERLAP = int(os.getenv("VISION_TILE_OVERLAP", "64"))
+VISION_MAX_TILES = int(os.getenv("VISION_MAX_TILES", "6"))
+VISION_IMAGE_FORMAT = os.getenv("VISION_IMAGE_FORMAT", "jpeg").lower()  # jpeg | webp | png
+VISION_IMAGE_QUALITY = int(os.getenv("VISION_IMAGE_QUALITY", "85"))
+
+logger = logging.getLogger(__name__)
+
+_MIME_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+
+
+class VisionImage(NamedTuple):
+    """One encoded image part for a vision request"""
+    data: bytes
+    mime_type: str
+
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """Drop alpha/palette so the image can be encoded as JPEG"""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    if image.mode not in ("RGB", "L"):
+        return image.convert("RGB")
+    return image
+
+
+def _encode(image: Image.Image) -> VisionImage:
+    image_format = VISION_IMAGE_FORMAT if VISION_IMAGE_FORMAT in _MIME_TYPES else "jpeg"
+    buffer = io.BytesIO()
+    if image_format == "png":
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.save(buffer, format=image_format.upper(), quality=VISION_IMAGE_QUALITY)
+    return VisionImage(buffer.getvalue(), _MIME_TYPES[image_format])
+
+
+def _fit_tiles(image: Image.Image) -> Image.Image:
+    """Shrink an image whose long side needs more than VISION_MAX_TILES tiles, so the tiles cover all of it"""
+    stride = max(1, VISION_TILE_LENGTH - VISION_TILE_OVERLAP)
+    coverable = VISION_TILE_LENGTH + (VISION_MAX_TILES - 1) * stride
+    length = max(image.size)
+    if length <= coverable:
+        return image
+    scale = coverable / length
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    logger.info(f"Image needs more than {VISION_MAX_TILES} tiles; downscaling {image.size} to {size}")
+    return image.resize(size, Image.LANCZOS)
+
+
+def _tile(image: Image.Image) -> List[Image.Image]:
+    """Split along the long axis into overlapping tiles of VISION_TILE_LENGTH"""
+    vertical = image.height >= image.width
+    length = image.height if vertical else image.width
+    stride = max(1, VISION_TILE_LENGTH - VISION_TILE_OVERLAP)
+
+    tiles = []
+    start = end = 0
+    while start < length and len(tiles) < VISION_MAX_TILES:
+        end = min(length, start + VISION_TILE_LENGTH)
+        box = (0, start, image.width, end) if vertical else (start, 0, end, image.height)
+        tiles.append(image.crop(box))
+        if end == length:
+            break
+        start += stride
+    if end < length:
+        logger.warning(f"Vision tiles cover {end} of {length} pixels; the rest is dropped")
+    return tiles
+
+
+def prepare_vision_images(stream: BinaryIO) -> List[VisionImage]:
+    """
+    Resize and re-encode an image for a vision request.
+
+    The image is scaled (never up) so its short side is at most
+    VISION_SHORT_SIDE. If the long side still exceeds VISION_LONG_SIDE, the
+    image is cut into tiles in reading order. Otherwise it is scaled to fit
+    VISION_LONG_SIDE.
+    """
+    image = ImageOps.exif_transpose(Image.open(stream))
+    image = _flatten(image)
+
+    scale = min(1.0, VISION_SHORT_SIDE / min(image.size))
+    if max(image.size) * scale <= VISION_LONG_SIDE:
+        scale = min(scale, VISION_LONG_SIDE / max(image.size))
+    if scale < 1.0:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+
+    parts = _tile(_fit_tiles(image)) if max(image.size) > VISION_LONG_SIDE else [image]
+    return [_encode(part) for part in parts]
@@ -0,0 +1,48 @@
+import io
+import os
+import asyncio
+from tempfile import SpooledTemporaryFile
+
+from docx import Document
+from PIL import Image
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartParser
+
+from services.document_processor import DocumentProcessor
+from services.extraction_cache import ExtractionCache
+from services.extraction_pool import ExtractionPool
+
+
+def make_large_docx(text: str) -> bytes:
+    """DOCX padded past the spool threshold with an incompressible embedded image"""
+    document = Document()
+    document.add_paragraph(text)
+    noise = Image.frombytes("RGB", (700, 700), os.urandom(700 * 700 * 3))
+    picture = io.BytesIO()
+    noise.save(picture, format="PNG")
+    picture.seek(0)
+    document.add_picture(picture)
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def test_docx_larger_than_spool_threshold_is_extracted():
+    content = make_large_docx("The tenant shall give sixty days written notice.")
+    assert len(content) > MultiPartParser.spool_max_size
+
+    pool = ExtractionPool(max_workers=1)
+    processor = DocumentProcessor(extraction_pool=pool, extraction_cache=ExtractionCache(path=""))
+    # Spooled the way Starlette's form parser does, so it has rolled over to disk
+    spooled = SpooledTemporaryFile(max_size=MultiPartParser.spool_max_size)
+    spooled.write(content)
+    spooled.seek(0)
+    upload = UploadFile(spooled, filename="lease.docx")
+    try:
+        result = asyncio.run(processor.extract(upload))
+    finally:
+        pool.shutdown()
+        spooled.close()
+
+    assert result.text == "The tenant shall give sixty days written notice."
+    assert not result.truncated